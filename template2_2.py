@@ -62,16 +62,21 @@ def process_final_output(sWM):
     finished derivations."""
     print(f'{sWM.pop()}')
 
-# Create three primitive phrase structure objects
-a = PhraseStructure()
-a.phonological_exponent = 'a'
-b = PhraseStructure()
-b.phonological_exponent = 'b'
-c = PhraseStructure()
-c.phonological_exponent = 'c'
-
-# Initial lexical feed (set of primitive constituents from root lexicon) for the derivation
-Numeration = {a, b, c}
-
-# Create all derivations from the numeration
-derivational_search_function(Numeration)
+def main():
+    # Create three primitive phrase structure objects
+    a = PhraseStructure()
+    a.phonological_exponent = 'a'
+    b = PhraseStructure()
+    b.phonological_exponent = 'b'
+    c = PhraseStructure()
+    c.phonological_exponent = 'c'
+
+    # Initial lexical feed (set of primitive constituents from root lexicon) for the derivation
+    Numeration = {a, b, c}
+
+    # Create all derivations from the numeration
+    derivational_search_function(Numeration)
+
+
+if __name__ == '__main__':
+    main()
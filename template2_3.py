@@ -126,14 +126,19 @@ def process_final_output(sWM):
     X = sWM.pop()
     print(f'{N_sentences}. {X.linearize()[:-1]}     {X}')
 
-# Initialize the lexicon
-Lex = Lexicon()
+def main():
+    # Initialize the lexicon
+    Lex = Lexicon()
 
-# Initial lexical feed (set of primitive constituents) for the derivation
-Numeration = {Lex.retrieve('a'),
-              Lex.retrieve('b'),
-              Lex.retrieve('d'),
-              Lex.retrieve('d')}
+    # Initial lexical feed (set of primitive constituents) for the derivation
+    Numeration = {Lex.retrieve('a'),
+                  Lex.retrieve('b'),
+                  Lex.retrieve('d'),
+                  Lex.retrieve('d')}
 
-# Create all derivations from the numeration
-derivational_search_function(Numeration)
+    # Create all derivations from the numeration
+    derivational_search_function(Numeration)
+
+
+if __name__ == '__main__':
+    main()
@@ -128,14 +128,19 @@ def process_final_output(sWM):
     X = sWM.pop()
     print(f'{N_sentences}. {X.linearize()}  {X}')
 
-# Initialize the lexicon
-Lex = Lexicon()
+def main():
+    # Initialize the lexicon
+    Lex = Lexicon()
 
-# Numeration is the initial lexical feed (set of primitive constituents)
-# for the derivation
-Numeration = {Lex.retrieve('the'),
-              Lex.retrieve('bark'),
-              Lex.retrieve('ing')}
+    # Numeration is the initial lexical feed (set of primitive constituents)
+    # for the derivation
+    Numeration = {Lex.retrieve('the'),
+                  Lex.retrieve('bark'),
+                  Lex.retrieve('ing')}
 
-# Create all derivations from the numeration
-derivational_search_function(Numeration)
+    # Create all derivations from the numeration
+    derivational_search_function(Numeration)
+
+
+if __name__ == '__main__':
+    main()
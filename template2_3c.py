@@ -206,7 +206,6 @@ def process_final_output(sWM):
     X = sWM.pop()
     print(f'\t{N_sentences}. {X.linearize()}   {X}')
 
-Lex = Lexicon()
 Numeration_lst = [['a', 'b', 'c'],
                  ['the', 'dog', 'bite', 'the', 'man'],
                   ['the', 'dog', 'bark'],
@@ -214,5 +213,11 @@ Numeration_lst = [['a', 'b', 'c'],
                   ['the', 'bark', 'ing']
                   ]
 
-for numeration in Numeration_lst:
-    derive({Lex.retrieve(word) for word in numeration})
+def main():
+    Lex = Lexicon()
+    for numeration in Numeration_lst:
+        derive({Lex.retrieve(word) for word in numeration})
+
+
+if __name__ == '__main__':
+    main()
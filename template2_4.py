@@ -282,15 +282,19 @@ def process_final_output(sWM):
     PhraseStructure.log_report += f'\t{N_sentences}. {X.linearize()}    {X}\n'
 
 
-Lex = Lexicon()
-
 Numeration_lst = [['the', 'dog', 'barks'],
                   ['the', 'dog', 'v', 'bite', 'the', 'man'],
                   ['the', 'dog', 'ed', 'v', 'bite', 'the', 'man']]
 
-log_file = open('log.txt', 'w')
+def main():
+    Lex = Lexicon()
+    log_file = open('log.txt', 'w')
+    for numeration in Numeration_lst:
+        PhraseStructure.log_report = '\n\n=====\nNumeration: {' + ', '.join(numeration) + '}\n'
+        derive({Lex.retrieve(word) for word in numeration})
+        log_file.write(PhraseStructure.log_report)
+    log_file.close()
+
 
-for numeration in Numeration_lst:
-    PhraseStructure.log_report = '\n\n=====\nNumeration: {' + ', '.join(numeration) + '}\n'
-    derive({Lex.retrieve(word) for word in numeration})
-    log_file.write(PhraseStructure.log_report)
+if __name__ == '__main__':
+    main()
@@ -439,8 +439,6 @@ def process_final_output(sWM):
     PhraseStructure.chain_index = 0
     data.add(data_str)
 
-Lex = Lexicon()
-
 Numeration_lst = [['the', 'dog', 'ed', 'bark'],
                   ['the', 'dog', 'does', 'bark'],
                   ['the', 'man', 'was', 'en', 'bite'],
@@ -457,9 +455,16 @@ Numeration_lst = [['the', 'dog', 'ed', 'bark'],
                   ['the', 'dog', 'ed', 'v', 'bite', 'the', 'man', 'frequently'],
                   ['C(wh)', 'which', 'dog', 'does', 'bark', 'frequently']]
 
-log_file = open('log.txt', 'w')
+def main():
+    Lex = Lexicon()
+    log_file = open('log.txt', 'w')
+    for numeration in Numeration_lst:
+        PhraseStructure.log_report = '\n\n=====\nNumeration: {' + ', '.join(numeration) + '}\n'
+        derive({Lex.retrieve(word) for word in numeration})
+        log_file.write(PhraseStructure.log_report)
+    log_file.close()
+
+
+if __name__ == '__main__':
+    main()
 
-for numeration in Numeration_lst:
-    PhraseStructure.log_report = '\n\n=====\nNumeration: {' + ', '.join(numeration) + '}\n'
-    derive({Lex.retrieve(word) for word in numeration})
-    log_file.write(PhraseStructure.log_report)
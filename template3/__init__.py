@@ -0,0 +1,20 @@
+"""Minimalist bottom-up grammar with Merge, Move and the kernel for Agree,
+with asymmetric bare phrase structure.
+
+Importing the package has no side effects: nothing is derived and no log
+file is opened until a study is run, e.g. with ``python -m template3``.
+"""
+
+from template3.lexicon import Lexicon, lexicon, lexical_redundancy_rules
+from template3.phrase_structure import PhraseStructure
+from template3.grammar import CompiledGrammar
+from template3.speaker_model import SpeakerModel, SearchInstrumentation
+from template3.language_data import LanguageData
+from template3.evaluation import EvaluationTable, evaluate_study
+from template3.result_store import ResultStore, ResultReader
+from template3.serialization import StructureCodec
+from template3.forest import Forest
+from template3.sampler import Sample
+from template3.server import DerivationServer
+from template3.aio import stream_outputs, derive_async, derive_batch_async
+from template3.study import run_study, count_study, sample_study, main
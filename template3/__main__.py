@@ -0,0 +1,3 @@
+from template3.study import main
+
+main()
@@ -0,0 +1,83 @@
+"""Asyncio front-end for the speaker model.
+
+The derivational search runs on the event loop in cooperative chunks: after
+every `chunk` derivational steps it yields control to the loop, so that one
+process can serve many concurrent derivations without blocking. Cancelling the
+task (directly or with asyncio.wait_for) stops the search at the next chunk
+boundary. Each derivation is resumed inside a contextvars.Context of its own,
+so that its DerivationContext stays active for it alone, whichever task (or
+finalizer) drives it.
+
+    async for sentence in stream_outputs(sm, ['the', 'dog', 'barks']):
+        print(sentence)
+
+    ctx = await asyncio.wait_for(derive_async(sm, numeration), timeout=5)
+"""
+
+import asyncio
+import contextvars
+from concurrent.futures import ProcessPoolExecutor
+
+CHUNK = 200     #   Derivational steps between two yields to the event loop
+
+
+def _chunks(sm, numeration, chunk, budgets):
+    """Returns the DerivationContext and the steps of a derivation run in its own
+    contextvars.Context"""
+    ctx = sm.new_context(**budgets)
+    ctx.yield_every = chunk
+    context = contextvars.Context()
+    derivation = sm.derivation(numeration, ctx)
+
+    def steps():
+        try:
+            while True:
+                try:
+                    yield context.run(next, derivation)
+                except StopIteration:
+                    return
+        finally:
+            context.run(derivation.close)
+    return ctx, steps()
+
+
+async def stream_outputs(sm, numeration, chunk=CHUNK, **budgets):
+    """Asynchronous iterator over the output sentences of the derivation, each
+    produced once, as soon as the search finds it"""
+    _, steps = _chunks(sm, numeration, chunk, budgets)
+    try:
+        for output_sentence in steps:
+            if output_sentence is None:
+                await asyncio.sleep(0)
+            else:
+                yield output_sentence
+    finally:
+        steps.close()
+
+
+async def derive_async(sm, numeration, chunk=CHUNK, **budgets):
+    """Runs the derivation cooperatively and returns its DerivationContext"""
+    ctx, steps = _chunks(sm, numeration, chunk, budgets)
+    try:
+        for output_sentence in steps:
+            if output_sentence is None:
+                await asyncio.sleep(0)
+    finally:
+        steps.close()
+    return ctx
+
+
+async def derive_batch_async(sm, numerations, executor=None, chunk=CHUNK, **budgets):
+    """Derives several numerations concurrently and returns their DerivationContexts in
+    the order of the numerations. Without an executor the derivations are interleaved
+    on the event loop; with one they are offloaded to it with run_in_executor. The
+    executor must be a thread pool: the derivations share the speaker model and return
+    DerivationContexts, which cannot be sent between processes (template3.server
+    schedules derivations onto worker processes)"""
+    if executor is None:
+        return await asyncio.gather(*(derive_async(sm, numeration, chunk, **budgets) for numeration in numerations))
+    if isinstance(executor, ProcessPoolExecutor):
+        raise TypeError('derive_batch_async() requires a thread executor')
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(loop.run_in_executor(executor, lambda n=numeration: sm.run(n, **budgets))
+                                  for numeration in numerations))
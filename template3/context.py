@@ -0,0 +1,56 @@
+"""Per-derivation state.
+
+Each derivation owns a DerivationContext. The speaker model passes it through the
+derivational search function and activates it in a context variable for the
+duration of the derivation, so that grammatical operations (which take only
+phrase structure objects as arguments) can reach it. Context variables are local
+to the thread and to the asyncio task, so concurrent derivations do not share
+any of this state.
+"""
+
+from contextvars import ContextVar
+
+current_context = ContextVar('derivation_context')
+
+
+class DerivationContext:
+    """State owned by one derivation: log buffer, counters, outputs and budgets"""
+    def __init__(self):
+        self.chain_counter = 0      #   Last chain index handed out
+        self.path = []              #   Operations leading to the current workspace
+        self.tracing = True         #   Write every derivational step into the log file
+        self.partial_order_reduction = False
+        self.log_file = None
+        self.logging_report = ''    #   Log text of the current step, collected by the operations
+        self.n_steps = 0
+        self.n_accepted = 0
+        self.output_data = set()
+        self.final_outputs = dict() #   Structural hash of each final workspace: (linearization, accepted, failure)
+        self.n_duplicates = 0
+        self.derivation_paths = []  #   Path of each accepted output, in order of acceptance
+        self.forest = None          #   Packed forest collecting the output structures of a memoized search
+        self.instrumentation = None
+        self.records = None         #   Result store records of the derivation, if any
+        self.step_budget = None     #   Budgets in force, None means unlimited
+        self.node_budget = None
+        self.deadline = None
+        self.truncated = None       #   Name of the budget that stopped the derivation, if any
+        self.infeasible = None      #   Reason why the numeration was rejected before search, if it was
+        self.dispatch = []          #   Compiled syntactic operations, see template3.grammar
+        self.lookahead = None       #   Selection lookup of the grammar when the lookahead prunes the search
+        self.screen = None          #   Pair screen of the grammar when operand pairs are screened
+        self.n_pruned = 0
+        self.yield_every = None     #   Number of steps after which a chunked search yields control
+
+    def new_chain_index(self):
+        self.chain_counter += 1
+        return self.chain_counter
+
+
+def derivation_context():
+    """Returns the active derivation context. Operations that need one (chain
+    labelling, movement logging) can only run within a derivation"""
+    ctx = current_context.get(None)
+    if ctx is None:
+        raise LookupError('No active derivation: activate a DerivationContext in current_context first')
+    return ctx
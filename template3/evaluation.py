@@ -0,0 +1,142 @@
+"""Batch evaluation of whole studies against their gold standards"""
+
+import csv
+import json
+import time
+from collections import Counter
+
+
+def normalize(sentence, normalization=None):
+    """Normalizes a sentence before comparison. 'whitespace' collapses runs of whitespace,
+    'morphemes' additionally removes the morpheme boundary symbol #"""
+    if not normalization:
+        return sentence
+    sentence = ' '.join(sentence.split())
+    if normalization == 'morphemes':
+        sentence = sentence.replace('#', '')
+    return sentence
+
+
+class EvaluationTable:
+    """Columnar table of study results with one row per (dataset block, sentence)
+    pair that occurs in the simulation output or in the gold standard"""
+    def __init__(self, normalization=None):
+        self.normalization = normalization
+        # Row columns
+        self.block = []
+        self.sentence = []
+        self.generated = []
+        self.gold = []
+        # Block columns
+        self.numeration = []
+        self.n_steps = []
+        self.seconds = []
+        self.truncated = []
+
+    def add_block(self, numeration, output_from_simulation, gold_standard_dataset, n_steps, seconds=0.0, truncated=None):
+        b = len(self.numeration)
+        self.numeration.append(tuple(numeration))
+        self.n_steps.append(n_steps)
+        self.seconds.append(seconds)
+        self.truncated.append(truncated)
+        generated = {normalize(s, self.normalization) for s in output_from_simulation}
+        gold = {normalize(s, self.normalization) for s in gold_standard_dataset}
+        for s in sorted(generated | gold):
+            self.block.append(b)
+            self.sentence.append(s)
+            self.generated.append(s in generated)
+            self.gold.append(s in gold)
+
+    def evaluate(self):
+        """Computes precision, recall, per-block figures and per-lexical-item
+        error attribution in one pass over the rows"""
+        tp = [0] * len(self.numeration)
+        fp = [0] * len(self.numeration)
+        fn = [0] * len(self.numeration)
+        for b, generated, gold in zip(self.block, self.generated, self.gold):
+            if generated and gold:
+                tp[b] += 1
+            elif generated:
+                fp[b] += 1
+            else:
+                fn[b] += 1
+        item_errors = Counter()     #   Errors in blocks whose numeration contains the item
+        item_blocks = Counter()     #   Blocks whose numeration contains the item
+        for b, numeration in enumerate(self.numeration):
+            for item in set(numeration):
+                item_blocks[item] += 1
+                item_errors[item] += fp[b] + fn[b]
+        blocks = [{'block': b + 1,
+                   'numeration': ','.join(self.numeration[b]),
+                   'n_steps': self.n_steps[b],
+                   'seconds': self.seconds[b],
+                   'truncated': self.truncated[b],
+                   'true_positives': tp[b],
+                   'overgeneration': fp[b],
+                   'undergeneration': fn[b],
+                   'errors': fp[b] + fn[b],
+                   'precision': ratio(tp[b], tp[b] + fp[b]),
+                   'recall': ratio(tp[b], tp[b] + fn[b])} for b in range(len(self.numeration))]
+        TP, FP, FN = sum(tp), sum(fp), sum(fn)
+        summary = {'blocks': len(self.numeration),
+                   'errors': FP + FN,
+                   'overgeneration': FP,
+                   'undergeneration': FN,
+                   'precision': ratio(TP, TP + FP),
+                   'recall': ratio(TP, TP + FN),
+                   'truncated_blocks': sum(1 for t in self.truncated if t),
+                   'n_steps': sum(self.n_steps),
+                   'seconds': sum(self.seconds)}
+        lexical_items = {item: {'blocks': item_blocks[item], 'errors': item_errors[item]}
+                         for item in sorted(item_blocks, key=lambda i: -item_errors[i])}
+        return {'summary': summary, 'blocks': blocks, 'lexical_items': lexical_items}
+
+    def rows(self):
+        for b, s, generated, gold in zip(self.block, self.sentence, self.generated, self.gold):
+            yield {'block': b + 1, 'numeration': ','.join(self.numeration[b]), 'sentence': s,
+                   'generated': generated, 'gold': gold, 'error': generated != gold}
+
+    def to_csv(self, filename, table='rows'):
+        """Writes either the sentence rows or the per-block figures as CSV"""
+        records = list(self.rows()) if table == 'rows' else self.evaluate()['blocks']
+        with open(filename, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(records[0].keys()) if records else ['block'])
+            writer.writeheader()
+            writer.writerows(records)
+
+    def to_json(self, filename):
+        result = self.evaluate()
+        result['rows'] = list(self.rows())
+        with open(filename, 'w') as f:
+            json.dump(result, f, indent=1, ensure_ascii=False)
+
+    def export(self, filename):
+        if filename.endswith('.json'):
+            self.to_json(filename)
+        else:
+            self.to_csv(filename)
+
+
+def ratio(a, b):
+    return a / b if b else 1.0
+
+
+def evaluate_study(ld, sm, normalization=None, log_file='log.txt'):
+    """Runs the whole study without per-block console output and collects
+    the results into an evaluation table"""
+    table = EvaluationTable(normalization)
+    sm.log_file = ld.start_logging(log_file)
+    sm.verbose = False
+    for n_dataset, (numeration, gold_standard_dataset) in enumerate(ld.study_dataset, start=1):
+        sm.log_file.write('\n---------------------------------------------------\n')
+        sm.log_file.write(f'Dataset {n_dataset}:\n')
+        sm.log_file.write(f'Numeration: {numeration}\n')
+        sm.log_file.write(f'Predicted outcome: {gold_standard_dataset}\n\n\n')
+        start = time.perf_counter()
+        sm.derive(numeration)
+        table.add_block(numeration, sm.output_data, gold_standard_dataset, sm.n_steps,
+                        time.perf_counter() - start, sm.truncated)
+        if sm.instrumentation:
+            sm.log_file.write(sm.instrumentation.report())
+    sm.log_file.close()
+    return table
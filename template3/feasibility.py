@@ -0,0 +1,137 @@
+"""Static feasibility analysis of numerations.
+
+An output is accepted only if every head in it passes the interface tests for
+obligatory selection (!COMP, !SPEC and !wCOMP). infeasibility() checks necessary
+conditions for this over the composed lexical features of a numeration before any
+search takes place. It returns the reason why the numeration has no derivation, or
+None if it may have one. The conditions follow from the operations of the grammar:
+
+    - A lexical item escapes the interface tests only if direct Head Merge absorbs
+      it into a complex head, which requires some other item licensing it (ε).
+    - A terminal with !wCOMP must head a complex head, formed by direct Head Merge (ε)
+      or by head movement (PC:#X). The other part of it is some other item, which
+      must have the w-selected features (the host of the bound morpheme).
+    - Every !COMP and !SPEC requirement needs an item with the selected features
+      and without the excluded ones. Without phrasal movement (no EPP, and no head
+      with both SCOPE and WH) there are no phrasal copies and every item heads at
+      most one complement or specifier, so the requirements must be met by
+      distinct items.
+
+Failures that depend on the geometry of the structure, such as island effects,
+are left to the search.
+"""
+
+from template3.grammar import Selection
+
+
+def infeasibility(numeration, lexicon):
+    """Returns the reason why the numeration cannot have a derivation, None if it may have one"""
+    items = [(name, lexicon.compose_lexical_entry(name)) for name in numeration]
+    selections = [Selection(features) for name, features in items]
+    licensers = [i for i, (name, features) in enumerate(items) if 'ε' in features]
+    movement = any('EPP' in features or {'SCOPE', 'WH'} <= features for name, features in items)
+    slots = []      #   (description of the requirement, indices of the items that could meet it)
+    for i, (name, features) in enumerate(items):
+        if any(j != i for j in licensers):
+            continue    #   The item may end up inside a complex head, where nothing is required of it
+        s = selections[i]
+        if s.obligatory_wcomplement:
+            if 'ε' not in features and 'PC:#X' not in features:
+                return f'{name} requires a word-internal complement but cannot form a complex head'
+            if not any(j != i and s.obligatory_wcomplement <= other for j, (_, other) in enumerate(items)):
+                return f'no host for {name}: no other item has {", ".join(sorted(s.obligatory_wcomplement))}'
+        for role, positive, negative in (('complement', s.positive_comp, s.negative_comp),
+                                         ('specifier', s.positive_spec, s.negative_spec)):
+            if positive:
+                candidates = [j for j, (_, other) in enumerate(items)
+                              if (j != i or movement) and positive <= other and not negative & other]
+                requirement = f'{name} requires a {role} with {", ".join(sorted(positive))}'
+                if not candidates:
+                    return f'{requirement}, but no item of the numeration can head one'
+                slots.append((requirement, candidates))
+    if not movement:
+        failure = unmatched_slot(slots)
+        if failure:
+            return f'{failure}, but the items that could head one are needed elsewhere'
+
+
+def unmatched_slot(slots):
+    """Matches every requirement with a distinct item (augmenting paths) and returns the
+    description of the first requirement that cannot be matched, None if all can"""
+    match = dict()      #   Item index: slot index
+
+    def augment(s, seen):
+        for j in slots[s][1]:
+            if j not in seen:
+                seen.add(j)
+                if j not in match or augment(match[j], seen):
+                    match[j] = s
+                    return True
+        return False
+
+    for s, (requirement, candidates) in enumerate(slots):
+        if not augment(s, set()):
+            return requirement
+
+
+def dead_workspace(sWM, added, selection=Selection):
+    """Lookahead during the search: returns the reason why no output can be derived from
+    the workspace sWM, whose members added were just created by an operation, or None.
+    selection maps a feature set to its Selection, e.g. CompiledGrammar.selection.
+
+    Workspace members never change (see speaker_model.tcopy), so inside a phrasal member
+    every head is final, except that the head of a root may still get a specifier by
+    external Merge; complex heads are final too. Only the new members need to be tested. The outstanding requirements of the roots (complement
+    and specifier of unmerged heads, specifier of phrases still lacking one, host of a
+    !wCOMP terminal) are then matched with distinct other roots, which are the only
+    constituents that can still fill them. Specifiers that phrasal movement (EPP, or
+    SCOPE with WH) may fill with a copy are not counted, and no requirements are
+    counted while a head licensing direct Head Merge (ε) could absorb other heads."""
+    for X in added:
+        failure = closed_failure(X)
+        if failure:
+            return failure
+    roots = [X for X in sWM if not X.mother]
+    if any('ε' in X.features for X in sWM if X.zero_level()):
+        return None
+    heads = [X.head() for X in roots]
+    slots = []
+    for i, X in enumerate(roots):
+        H = heads[i]
+        s = selection(H.features)
+        if X.zero_level():
+            if X.terminal() and s.obligatory_wcomplement:
+                if 'PC:#X' not in H.features:
+                    return f'{H.phonological_exponent} requires a word-internal complement but cannot form a complex head'
+                if not any(j != i and s.obligatory_wcomplement <= heads[j].features for j in range(len(roots))):
+                    return f'no host left for {H.phonological_exponent}'
+            requirements = [('complement', s.positive_comp, s.negative_comp)]
+            if not ('EPP' in H.features or {'SCOPE', 'WH'} <= H.features):
+                requirements.append(('specifier', s.positive_spec, s.negative_spec))
+        elif not H.specifier():
+            requirements = [('specifier', s.positive_spec, s.negative_spec)]
+        else:
+            requirements = []
+        for role, positive, negative in requirements:
+            if positive:
+                candidates = [j for j in range(len(roots))
+                              if j != i and positive <= heads[j].features and not negative & heads[j].features]
+                requirement = f'{H} requires a {role} with {", ".join(sorted(positive))}'
+                if not candidates:
+                    return f'{requirement}, but no constituent left in the workspace can fill it'
+                slots.append((requirement, candidates))
+    failure = unmatched_slot(slots)
+    if failure:
+        return f'{failure}, but the constituents that could fill it are needed elsewhere'
+
+
+def closed_failure(X):
+    """Returns the reason why a new member X of the workspace already fails the interface
+    tests in a part of it that no later operation can change, None if it does not"""
+    if X.zero_level():
+        if not X.terminal() and not X.w_subcategorization():
+            return f'complex head {X} fails word-internal selection'
+        return None
+    H = X.head()
+    if not X.subcategorization(H if not X.mother and not H.specifier() else None):
+        return f'{X} fails the interface tests'
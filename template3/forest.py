@@ -0,0 +1,223 @@
+"""Packed shared forest of the outputs of a derivation.
+
+Accepted structures are interned into a DAG in which every distinct constituent is
+stored once (ForestNode) and shared by all structures that contain it. On demand
+the set of structures is packed into choice nodes: a Choice is a union of
+PackedNodes, and a PackedNode stands for every combination of the structures of
+its left and right Choices under one mother. Packing is exact, since the
+structures whose left constituents combine with the same set of right constituents
+are grouped together. Counting, enumeration and linearization work on the packed
+forest, so their cost depends on the number of distinct constituents and sentences
+rather than on the number of full structures.
+
+The forest is built by the memoized search of SpeakerModel.derive_forest().
+
+    forest = sm.derive_forest(['T', 'the', 'dog', 'bark', 'frequently', 'frequently'])
+    forest.count(), forest.sentences(), next(iter(forest))
+"""
+
+from collections import defaultdict
+from itertools import product
+
+from template3.phrase_structure import PhraseStructure
+
+
+class ForestNode:
+    """One distinct constituent. Chain indices are numbered canonically per output"""
+    def __init__(self, X, left, right, adjuncts, chain_index):
+        self.left = left
+        self.right = right
+        self.adjuncts = adjuncts            #   Tuple of ForestNodes
+        self.features = X.features
+        self.phonological_exponent = X.phonological_exponent
+        self.zero = X.zero
+        self.elliptic = X.elliptic
+        self.chain_index = chain_index
+        self.head_features = X.head().features
+        self.linearization = None
+        self.serial = None                  #   Order of interning, keeps enumeration deterministic
+
+    def properties(self):
+        """Everything that distinguishes the node from others with the same daughters"""
+        return (self.zero, self.elliptic, self.chain_index, id(self.features), self.phonological_exponent, self.adjuncts)
+
+    def terminal(self):
+        return self.left is None
+
+    def linearize(self):
+        if self.linearization is None:
+            if self.zero or self.terminal():
+                self.linearization = linearize(self, self.word()[:-1] + ' ')
+            else:
+                self.linearization = linearize(self, self.left.linearize() + self.right.linearize())
+        return self.linearization
+
+    def word(self):
+        if self.terminal():
+            return self.phonological_exponent + '#'
+        return self.left.word() + self.right.word()
+
+    def build(self, left=None, right=None):
+        """Returns the node as a phrase structure object with the given constituents"""
+        X = PhraseStructure(left, right)
+        X.features = self.features
+        X.phonological_exponent = self.phonological_exponent
+        X.zero = self.zero
+        X.elliptic = self.elliptic
+        X.chain_index = self.chain_index
+        for A in self.adjuncts:
+            Y = A.structure()
+            Y.mother = X
+            X.add_adjunct(Y)
+        return X
+
+    def structure(self):
+        if self.terminal():
+            return self.build()
+        return self.build(self.left.structure(), self.right.structure())
+
+
+def linearize(N, middle):
+    """Linearization of the ForestNode N given that of its constituents (or of its word),
+    mirroring PhraseStructure.linearize"""
+    if N.elliptic:
+        return ''
+    return ''.join(A.linearize() for A in N.adjuncts if 'λ:L' in A.head_features) + middle + \
+           ''.join(A.linearize() for A in N.adjuncts if 'λ:R' in A.head_features)
+
+
+class PackedNode:
+    """Mother node over every combination of the structures in the left and right Choices"""
+    def __init__(self, node, left=None, right=None):
+        self.node = node                    #   ForestNode carrying the properties of the mother
+        self.left = left
+        self.right = right
+        self.n = None
+        self.linearizations = None
+
+    def count(self):
+        if self.n is None:
+            self.n = 1 if self.left is None else self.left.count() * self.right.count()
+        return self.n
+
+    def __iter__(self):
+        if self.left is None:
+            yield self.node.build()
+        else:
+            for left, right in product(self.left, self.right):
+                yield self.node.build(left, right)
+
+    def words(self):
+        if self.left is None:
+            return {self.node.word()}
+        return {a + b for a in self.left.words() for b in self.right.words()}
+
+    def sentences(self):
+        if self.linearizations is None:
+            N = self.node
+            if N.zero or self.left is None:
+                middles = {w[:-1] + ' ' for w in self.words()}
+            else:
+                middles = {a + b for a in self.left.sentences() for b in self.right.sentences()}
+            self.linearizations = {linearize(N, middle) for middle in middles}
+        return self.linearizations
+
+
+class Choice:
+    """Union of alternative packed structures"""
+    def __init__(self, alternatives):
+        self.alternatives = alternatives
+        self.n = None
+        self.linearizations = None
+
+    def count(self):
+        if self.n is None:
+            self.n = sum(P.count() for P in self.alternatives)
+        return self.n
+
+    def __iter__(self):
+        for P in self.alternatives:
+            yield from P
+
+    def words(self):
+        return set().union(*(P.words() for P in self.alternatives))
+
+    def sentences(self):
+        if self.linearizations is None:
+            self.linearizations = set().union(*(P.sentences() for P in self.alternatives))
+        return self.linearizations
+
+
+class Forest:
+    """Shared forest of the distinct output structures of one derivation"""
+    def __init__(self):
+        self.nodes = dict()     #   (properties, left, right): ForestNode
+        self.roots = []         #   Output structures in order of acceptance
+        self.root_set = set()
+        self.packed = None
+        self.truncated = None   #   Budget that stopped the search, if any
+
+    def add(self, X, chains=None):
+        """Interns the output structure X, whose chain indices are mapped through chains"""
+        N = self.intern(X, chains or dict())
+        if N not in self.root_set:
+            self.root_set.add(N)
+            self.roots.append(N)
+            self.packed = None
+        return N
+
+    def intern(self, X, chains):
+        left = self.intern(X.left(), chains) if not X.terminal() else None
+        right = self.intern(X.right(), chains) if not X.terminal() else None
+        adjuncts = tuple(sorted((self.intern(A, chains) for A in X.adjuncts), key=lambda A: A.serial))
+        N = ForestNode(X, left, right, adjuncts, chains.get(X.chain_index, X.chain_index))
+        key = (N.properties(), left, right)
+        if key not in self.nodes:
+            N.serial = len(self.nodes)
+            self.nodes[key] = N
+        return self.nodes[key]
+
+    def size(self):
+        """Number of distinct constituents stored"""
+        return len(self.nodes)
+
+    def pack(self):
+        """Returns the packed forest as a Choice over all output structures"""
+        if self.packed is None:
+            memo = dict()
+            self.packed = self.pack_choice(frozenset(self.roots), memo)
+        return self.packed
+
+    def pack_choice(self, nodes, memo):
+        if nodes not in memo:
+            alternatives = []
+            groups = defaultdict(lambda: defaultdict(set))     #   properties: left: rights
+            representative = dict()
+            for N in sorted(nodes, key=lambda N: N.serial):
+                if N.terminal():
+                    alternatives.append(PackedNode(N))
+                else:
+                    groups[N.properties()][N.left].add(N.right)
+                    representative.setdefault(N.properties(), N)
+            for properties, rights_of_left in groups.items():
+                lefts_of_rights = defaultdict(list)
+                for left, rights in rights_of_left.items():
+                    lefts_of_rights[frozenset(rights)].append(left)
+                for rights, lefts in lefts_of_rights.items():
+                    alternatives.append(PackedNode(representative[properties],
+                                                   self.pack_choice(frozenset(lefts), memo),
+                                                   self.pack_choice(rights, memo)))
+            memo[nodes] = Choice(alternatives)
+        return memo[nodes]
+
+    def count(self):
+        """Number of distinct output structures"""
+        return self.pack().count()
+
+    def __iter__(self):
+        """Enumerates the output structures on demand as phrase structure objects"""
+        return iter(self.pack())
+
+    def sentences(self):
+        """Set of distinct output sentences"""
+        return {s.strip() for s in self.pack().sentences()}
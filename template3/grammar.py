@@ -0,0 +1,147 @@
+"""Compilation of the syntactic operations for one lexicon.
+
+The speaker model lists its operations as (preconditions, operation, arity, name)
+tuples which are interpreted generically for every candidate at every step. A
+CompiledGrammar turns them into dispatch entries specialized for the composed
+lexicon:
+
+    - the selection features of each lexical feature set (!COMP, -COMP, !SPEC,
+      -SPEC, !wCOMP, α) are extracted once instead of at every precondition call;
+    - steps that depend on features absent from the whole lexicon are left out,
+      e.g. without SCOPE there is no A-bar movement inside Merge, and operations
+      that can never apply (Head Merge without ε, Adjoin without α) are dropped;
+    - the conjuncts of each precondition are tested most selective first.
+
+The compiled preconditions and operations are equivalent to the ones in
+PhraseStructure. Operations the compiler does not know are dispatched as they are.
+"""
+
+from template3.phrase_structure import PhraseStructure
+from template3.screening import Screen, SCREEN_MIN, VECTOR_MIN
+
+
+def selection_features(features, prefix):
+    return {f.split(':')[1] for f in features if f.startswith(prefix)}
+
+
+class Selection:
+    """Selection features of one lexical feature set"""
+    def __init__(self, features):
+        self.features = features    #   Keeps the feature set, and hence its id, alive
+        self.positive_comp = selection_features(features, '!COMP')
+        self.negative_comp = selection_features(features, '-COMP')
+        self.positive_spec = selection_features(features, '!SPEC')
+        self.negative_spec = selection_features(features, '-SPEC')
+        self.obligatory_wcomplement = selection_features(features, '!wCOMP')
+        self.adjunction = next((f.split(':')[1] for f in features if f.startswith('α:')), None)
+
+
+class CompiledGrammar:
+    """Syntactic operations specialized for a lexicon. The dispatch list holds
+    (op_index, preconditions, operation, arity, name) entries, where op_index refers
+    to the uncompiled list so that derivation paths do not depend on the compilation"""
+    def __init__(self, lexicon, syntactic_operations):
+        self.lexicon = lexicon
+        self.syntactic_operations = list(syntactic_operations)
+        self.lexical_features = set().union(*lexicon.compose_speaker_lexicon().values())
+        self.selections = dict()    #   id(feature set): Selection
+        compilers = {PhraseStructure.MergePreconditions: (self.compile_merge, 'merge'),
+                     PhraseStructure.HeadMergePreconditions: (self.compile_head_merge, 'head merge'),
+                     PhraseStructure.AdjunctionPreconditions: (self.compile_adjunction, 'adjunction')}
+        self.dispatch = []
+        self.screened = dict()      #   op_index: kind of the compiled preconditions, see template3.screening
+        self.pair_screens = dict()  #   (screen_min, vector_min): Screen
+        for op_index, (Preconditions, OP, n, name) in enumerate(self.syntactic_operations):
+            if Preconditions in compilers:
+                compile, kind = compilers[Preconditions]
+                compiled = compile(OP)
+                if not compiled:
+                    continue        #   The operation can never apply with this lexicon
+                Preconditions, OP = compiled
+                self.screened[op_index] = kind
+            self.dispatch.append((op_index, Preconditions, OP, n, name))
+
+    def compiled_for(self, lexicon, syntactic_operations):
+        return lexicon is self.lexicon and syntactic_operations == self.syntactic_operations
+
+    def screen(self, screen_min=SCREEN_MIN, vector_min=VECTOR_MIN):
+        """Returns the pair screen of the compiled operations with the given
+        thresholds (template3.screening)"""
+        thresholds = (screen_min, vector_min)
+        if thresholds not in self.pair_screens:
+            self.pair_screens[thresholds] = Screen(self, screen_min, vector_min)
+        return self.pair_screens[thresholds]
+
+    def selection(self, features):
+        selection = self.selections.get(id(features))
+        if selection is None:
+            selection = self.selections[id(features)] = Selection(features)
+        return selection
+
+    def has_feature(self, prefix):
+        return any(f.startswith(prefix) for f in self.lexical_features)
+
+    def compile_merge(self, OP):
+        selection = self.selection
+        wcomplements = self.has_feature('!wCOMP')
+
+        def merge_preconditions(X, Y):
+            if X.mother or Y.mother:
+                return False
+            if wcomplements and Y.terminal() and selection(Y.features).obligatory_wcomplement:
+                return False
+            if X.zero_level():
+                s = selection(X.features)
+                features = Y.head().features
+                return s.positive_comp <= features and not (s.negative_comp & features)
+            if Y.zero_level():
+                return not selection(Y.features).positive_comp
+            s = selection(Y.head().features)
+            features = X.head().features
+            return s.positive_spec <= features and not (s.negative_spec & features)
+
+        if OP is PhraseStructure.MergeComposite:
+            OP = self.compile_merge_composite()
+        return merge_preconditions, OP
+
+    def compile_merge_composite(self):
+        head_movement = 'PC:#X' in self.lexical_features
+        a_bar_movement = {'SCOPE', 'WH'} <= self.lexical_features
+        a_movement = {'EPP', 'D'} <= self.lexical_features
+        if head_movement and a_bar_movement and a_movement:
+            return PhraseStructure.MergeComposite
+
+        def merge_composite(X, Y):
+            if head_movement:
+                X = X.HeadMovement(Y)
+            Z = X.Merge(Y)
+            if a_bar_movement:
+                Z = Z.phrasal_A_bar_movement()
+            if a_movement:
+                Z = Z.phrasal_A_movement()
+            return Z
+        return merge_composite
+
+    def compile_head_merge(self, OP):
+        if 'ε' not in self.lexical_features:
+            return None
+        selection = self.selection
+
+        def head_merge_preconditions(X, Y):
+            return 'ε' in Y.features and \
+                   X.zero_level() and \
+                   Y.zero_level() and \
+                   selection(Y.leftmost().features).obligatory_wcomplement <= X.rightmost().features
+        return head_merge_preconditions, OP
+
+    def compile_adjunction(self, OP):
+        if not self.has_feature('α:'):
+            return None
+        selection = self.selection
+
+        def adjunction_preconditions(X, Y):
+            if X.mother or Y.mother:
+                return False
+            licence = selection(X.head().features).adjunction
+            return bool(licence) and licence in Y.head().features
+        return adjunction_preconditions, OP
@@ -0,0 +1,53 @@
+"""Datasets of numerations and gold-standard target sentences"""
+
+from template3.phrase_structure import PhraseStructure
+
+
+class LanguageData:
+    """Stores and manipulates all data used in the simulation"""
+    def __init__(self):
+        self.study_dataset = []
+        self.log_file = None
+
+    # Read the dataset
+    def read_dataset(self, filename):
+        numeration = []
+        dataset = set()
+        with open(filename) as f:
+            lines = f.readlines()
+            for line in lines:
+                if line.strip() and not line.startswith('#') and not line.startswith('END'):
+                    line = line.strip()
+                    if line.startswith('Numeration='):
+                        if numeration:
+                            self.study_dataset.append((numeration, dataset))
+                            dataset = set()
+                        numeration = [word.strip() for word in line.split('=')[1].split(',')]
+                    else:
+                        dataset.add(line.strip())
+                if line.startswith('END'):
+                    break
+            self.study_dataset.append((numeration, dataset))
+
+    def start_logging(self, log_file='log.txt'):
+        log_file = open(log_file, 'w')
+        PhraseStructure.logging = log_file
+        return log_file
+
+    def evaluate_experiment(self, output_from_simulation, gold_standard_dataset, n_steps, truncated=None, n_duplicates=0,
+                            infeasible=None):
+        if infeasible:
+            print(f'\tNo derivation: {infeasible}')
+        print(f'\tDerivational steps: {n_steps}')
+        if n_duplicates:
+            print(f'\tDuplicate derivations: {n_duplicates}')
+        if truncated:
+            print(f'\tSearch truncated ({truncated} budget exceeded), the output is partial')
+        overgeneralization = output_from_simulation - gold_standard_dataset
+        undergeneralization = gold_standard_dataset - output_from_simulation
+        errors = len(overgeneralization) + len(undergeneralization)
+        print(f'\tErrors {errors}')
+        if errors > 0:
+            print(f'\tShould not generate: {overgeneralization}')
+            print(f'\tShould generate: {undergeneralization}')
+        return errors
@@ -0,0 +1,80 @@
+"""Root lexicon, lexical redundancy rules and the runtime speaker lexicon"""
+
+from template3.phrase_structure import PhraseStructure
+
+lexicon = {'a': {'a'}, 'b': {'b'}, 'c': {'c'}, 'd': {'d'},
+           'the': {'D'},
+           'dog': {'N'},
+           'bark': {'V', 'V/INTR'},
+           'barks': {'V', 'V/INTR'},
+           'ing': {'N', '!wCOMP:V', 'PC:#X', 'ε'},
+           'bites': {'V', '!COMP:D', '!SPEC:D'},
+           'bite': {'V', '!COMP:D'},
+           'bite*': {'V', 'V/TR'},
+           'which': {'D', 'WH'},
+           'man': {'N'},
+           'angry': {'A', 'α:N', 'λ:L'},
+           'frequently': {'Adv', 'α:V', 'λ:R'},
+           'city': {'N'},
+           'from': {'P'},
+           'in': {'P', 'α:V', },
+           'ed': {'T', 'PC:#X', '!wCOMP:V'},
+           'T': {'T', 'PC:#X', 'EPP', '!SPEC:D', '!wCOMP:V'},
+           'T*': {'T', 'PC:#X', '!wCOMP:V'},
+           'did': {'T', 'EPP'},
+           'does': {'T'},
+           'was': {'T', 'EPP'},
+           'C': {'C', 'PC:#X', '!wCOMP:T'},
+           'C(wh)': {'C', 'C(wh)', 'PC:#X', '!wCOMP:T', 'WH', 'SCOPE'},
+           'v': {'v', 'PC:#X', '!wCOMP:V'},
+           'v*': {'V', 'EPP', 'PC:#X', '!COMP:V', '-SPEC:v', '!wCOMP:V'},
+           'that': {'C'},
+           'believe': {'V', '!COMP:C'},
+           'seem': {'V', 'EPP', '!SPEC:D', '!COMP:T/inf', 'RAISING'},
+           'to': {'T/inf', '!COMP:V', '-COMP:RAISING', '-COMP:T', 'EPP'}}
+
+lexical_redundancy_rules = {'D': {'!COMP:N', '-COMP:Adv', '-SPEC:C', '-SPEC:T', '-SPEC:N', '-SPEC:V', '-SPEC:D', '-SPEC:P', '-SPEC:T/inf', '-SPEC:Adv'},
+                            'V': {'-SPEC:C', '-SPEC:N', '-SPEC:T', '-SPEC:T/inf', '-COMP:A', '-COMP:N', '-COMP:T'},
+                            'Adv': {'-COMP:D', '-COMP:N', '-SPEC:V', '-SPEC:v', '-SPEC:T', '-SPEC:D', '-COMP:Adv', '-COMP:A'},
+                            'P': {'!COMP:D', '-COMP:Adv', '-SPEC:Adv', '-SPEC:C', '-SPEC:T', '-SPEC:N', '-SPEC:V', '-SPEC:v', '-SPEC:T/inf', 'λ:R'},
+                            'C': {'!COMP:T', '-COMP:Adv', '-SPEC:V', '-SPEC:C', '-SPEC:N', '-SPEC:T/inf'},
+                            'A': {'-COMP:D', '-SPEC:Adv', '-COMP:Adv', '-SPEC:D', '-SPEC:V', '-COMP:V', '-COMP:T', '-SPEC:T', '-SPEC:C', '-COMP:C'},
+                            'N': {'-COMP:A', '-SPEC:Adv', '-COMP:V', '-COMP:D', '-COMP:V', '-COMP:T', '-COMP:Adv', '-SPEC:V', '-SPEC:T', '-SPEC:C', '-SPEC:N', '-SPEC:D', '-SPEC:N', '-SPEC:P', '-SPEC:T/inf'},
+                            'T': {'!COMP:V', '-COMP:Adv', '-SPEC:C', '-SPEC:T', '-SPEC:V', '-SPEC:T/inf', '-ε'},
+                            'v': {'V', '!COMP:V', '!SPEC:D', '-COMP:Adv', '-COMP:A', '-COMP:v',  '-SPEC:T/inf', '!wCOMP:V', '-ε'},
+                            'V/INTR': {'-COMP:D', '!SPEC:D'},
+                            'V/TR': {'-SPEC:D', '!COMP:D'}
+                            }
+
+class Lexicon:
+    """Stores lexical knowledge independently of the syntactic phrase structure.
+    Lexical entries are composed lazily on first retrieval, so that constructing
+    a Lexicon (and hence a speaker model) costs nothing up front"""
+    def __init__(self):
+        self.speaker_lexicon = dict()   #   The lexicon is a dictionary, filled on demand
+
+    def compose_speaker_lexicon(self):
+        """Composes the whole speaker lexicon from the list of words and lexical redundancy rules"""
+        for lex in lexicon.keys():
+            self.compose_lexical_entry(lex)
+        return self.speaker_lexicon
+
+    def compose_lexical_entry(self, lex):
+        """Composes one entry of the speaker lexicon by combining the root lexicon and
+        the lexical redundancy rules"""
+        if lex not in self.speaker_lexicon:
+            features = lexicon[lex]
+            for trigger_feature in lexical_redundancy_rules.keys():
+                if trigger_feature in lexicon[lex]:
+                    features = features | lexical_redundancy_rules[trigger_feature]
+            self.speaker_lexicon[lex] = features
+        return self.speaker_lexicon[lex]
+
+    def retrieve(self, name):
+        """Retrieves lexical items from the speaker lexicon and wraps them
+        into zero-level phrase structure objects"""
+        X0 = PhraseStructure()
+        X0.features = self.compose_lexical_entry(name)
+        X0.phonological_exponent = name
+        X0.zero = True
+        return X0
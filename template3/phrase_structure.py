@@ -0,0 +1,505 @@
+"""Asymmetric bare phrase structure formalism"""
+
+import random
+import weakref
+
+from template3.context import derivation_context
+
+major_lexical_categories = ['C', 'N', 'v', 'V', 'T/inf', 'A', 'D', 'Adv', 'T', 'P', 'a', 'b', 'c', 'd']
+
+HASH_MASK = (1 << 64) - 1
+_zobrist_keys = {}
+_zobrist_random = random.Random(0)
+
+
+def zobrist_key(item):
+    """Random 64-bit key of a lexical feature or phonological exponent, fixed for the process"""
+    key = _zobrist_keys.get(item)
+    if key is None:
+        key = _zobrist_keys.setdefault(item, _zobrist_random.getrandbits(64))
+    return key
+
+class PhraseStructure:
+    """Simple asymmetric binary-branching bare phrase structure formalism"""
+    logging = None
+    # A derivation creates and discards a node for every Merge and for every constituent
+    # copied by an operation. Fixed slots keep these nodes small and cheap to create
+    __slots__ = ('const', 'features', 'mother_ref', 'zero', 'adjuncts', 'phonological_exponent',
+                 'elliptic', 'chain_index', 'cached_str', 'cached_linearization', 'cached_hash',
+                 'cached_head', 'cached_goals', 'cached_row', 'cached_size', '__weakref__')
+
+    def __init__(self, X=None, Y=None):
+        self.const = (X, Y)
+        self.features = frozenset()         #   Lexical features, shared with the lexicon
+        self.mother_ref = None              #   Weak reference to the mother, see mother
+        if X:
+            X.mother = self
+        if Y:
+            Y.mother = self
+        self.zero = False
+        self.adjuncts = frozenset()         #   Shared while empty, see add_adjunct
+        self.phonological_exponent = ''
+        self.elliptic = False
+        self.chain_index = 0
+        self.cached_str = None              #   Renderings of the constituent, valid until
+        self.cached_linearization = None    #   invalidate() is called on it or inside it
+        self.cached_hash = None
+        self.cached_head = None
+        self.cached_goals = None            #   Feature: result of minimal search, for phrases
+        self.cached_row = None              #   (Screen, row) of a workspace member, see template3.screening
+        self.cached_size = None             #   Number of nodes, see size()
+
+    # Mothers are referred to weakly, so nodes form no reference cycles. The derivations
+    # keep alive the hosts of the adjuncts in their workspaces (see SpeakerModel.replay)
+    @property
+    def mother(X):
+        """Mother node, or the host of an adjunct"""
+        return X.mother_ref() if X.mother_ref else None
+
+    @mother.setter
+    def mother(X, Y):
+        X.mother_ref = weakref.ref(Y) if Y else None
+
+    def left(X):
+        """Abstraction for the notion of left daughter"""
+        return X.const[0]
+
+    def right(X):
+        """Abstraction for the notion of right daughter"""
+        return X.const[1]
+
+    def Merge(X, Y):
+        """Standard Merge"""
+        return PhraseStructure(X, Y)
+
+    def isLeft(X):
+        return X.sister() and X.mother.left() == X
+
+    def isRight(X):
+        return X.sister() and X.mother.right() == X
+
+    def phrasal(X):
+        return X.left() and X.right()
+
+    def copy(X):
+        """Recursive copying for constituents"""
+        left, right = X.const
+        if left or right:
+            Y = PhraseStructure(left.copy(), right.copy())
+        else:
+            Y = PhraseStructure()
+        Y.copy_properties(X)
+        if X.cached_goals:
+            Y.cached_goals = X.translate_goals(Y)
+        return Y
+
+    def copy_properties(Y, X):
+        Y.phonological_exponent = X.phonological_exponent
+        Y.features = X.features
+        Y.zero = X.zero
+        Y.chain_index = X.chain_index
+        Y.elliptic = X.elliptic
+        if X.adjuncts:
+            Y.adjuncts = X.adjuncts.copy()
+        Y.cached_str = X.cached_str
+        Y.cached_linearization = X.cached_linearization
+        Y.cached_hash = X.cached_hash
+        Y.cached_size = X.cached_size
+
+    def invalidate(X):
+        """Discards the cached renderings and hashes of X and of everything that contains X"""
+        while X:
+            X.cached_str = None
+            X.cached_linearization = None
+            X.cached_hash = None
+            X.cached_head = None
+            X.cached_goals = None
+            X.cached_row = None
+            X = X.mother
+
+    def structural_hash(X):
+        """Cached 64-bit hash of the constituent, independent of the numbering of chains"""
+        if X.cached_hash is None:
+            features = 0
+            for f in X.features:
+                features ^= zobrist_key(f)
+            adjuncts = 0
+            for A in X.adjuncts:
+                adjuncts += A.structural_hash()
+            flags = X.zero | X.elliptic << 1 | (X.chain_index != 0) << 2
+            X.cached_hash = hash((flags, features, zobrist_key(X.phonological_exponent),
+                                  X.left().structural_hash() if X.left() else 0,
+                                  X.right().structural_hash() if X.right() else 0,
+                                  adjuncts & HASH_MASK)) & HASH_MASK
+        return X.cached_hash
+
+    def chaincopy(X):
+        """Grammatical copying operation, with phonological silencing"""
+        X.label_chain()
+        Y = X.copy()
+        X.elliptic = True
+        X.invalidate()
+        return Y
+
+    def size(X):
+        """Number of nodes in the constituent, cached since the constituents of a node never change"""
+        if X.cached_size is None:
+            X.cached_size = 1 if X.terminal() else 1 + X.left().size() + X.right().size()
+        return X.cached_size
+
+    def zero_level(X):
+        """Zero-level categories are considered primitive by phrasal syntactic rules"""
+        return X.zero or X.terminal()
+
+    def terminal(X):
+        """Terminal elements do not have constituents"""
+        return not X.right() and not X.left()
+
+    def MergeComposite(X, Y):
+        """Composite Merge operation contains head and phrasal movements (if applicable) and Merge"""
+        return X.HeadMovement(Y).Merge(Y).PhrasalMovement()
+
+    def MergePreconditions(X, Y):
+        """Preconditions for Merge"""
+        if X.isRoot() and Y.isRoot():
+            if Y.terminal() and Y.obligatory_wcomplement_features():
+                return False
+            if X.zero_level():
+                return X.complement_subcategorization(Y)
+            elif Y.zero_level():
+                return Y.complement_subcategorization(None)
+            else:
+                return Y.head().specifier_subcategorization(X)
+
+    def HeadMovement(X, Y):
+        if X.HeadMovementPreconditions(Y):
+            ctx = derivation_context()
+            if ctx.tracing:
+                ctx.logging_report += f'\n\t\t + Head chain by {X}° targeting {Y.head()}°'
+            return Y.head().chaincopy().HeadMerge_(X)
+        return X
+
+    def HeadMovementPreconditions(X, Y):
+        return X.zero_level() and \
+               X.bound_morpheme() and \
+               not X.mandateDirectHeadMerge()
+
+    def PhrasalMovement(X):
+        return X.phrasal_A_bar_movement().phrasal_A_movement()
+
+    def phrasal_A_bar_movement(X):
+        if X.head().scope_marker() and X.head().operator() and X.head().complement() and X.head().complement().minimal_search('WH') and not X.head().complement().minimal_search('WH').elliptic:
+            ctx = derivation_context()
+            if ctx.tracing:
+                ctx.logging_report += f'\n\t\t + Phrasal A-bar chain by {X.head()}° targeting {X.head().complement().minimal_search("WH")}'
+            return X.head().complement().minimal_search('WH').chaincopy().Merge(X)
+        return X
+
+    def phrasal_A_movement(X):
+        if X.head().EPP() and X.head().complement() and X.head().complement().phrasal() and X.head().complement().goal_for_A_movement():
+            ctx = derivation_context()
+            if ctx.tracing:
+                ctx.logging_report += f'\n\t\t + Phrasal A chain by {X.head()}° targeting {X.head().complement().goal_for_A_movement()}'
+            return X.head().complement().goal_for_A_movement().chaincopy().Merge(X)
+        return X
+
+    def referential(X):
+        return 'D' in X.head().features
+
+    def goal_for_A_movement(X):
+        return next((x for x in [X.left(), X.right()] if x.phrasal() and x.referential()), None)
+
+    def HeadMerge_(X, Y):
+        """Direct Head Merge creates zero-level objects from two zero-level objects"""
+        Z = X.Merge(Y)
+        Z.zero = True
+        Z.features = Y.features     #   Feature inheritance
+        Z.adjuncts = Y.adjuncts     #   Feature inheritance
+        return Z
+
+    def HeadMergePreconditions(X, Y):
+        """Preconditions for direct Head Merge are that both objects must be
+        zero-level objects, Y must select X and license the operation"""
+        return X.zero_level() and \
+               Y.zero_level() and \
+               Y.w_selects(X) and \
+               Y.licenseDirectHeadMerge()
+
+    def w_selects(Y, X):
+        """Word-internal selection (X Y) where Y w-selects X"""
+        return Y.leftmost().obligatory_wcomplement_features() <= X.rightmost().features
+
+    def leftmost(X):
+        while X.left():
+            X = X.left()
+        return X
+
+    def rightmost(X):
+        while X.right():
+            X = X.right()
+        return X
+
+    def Adjoin_(X, Y):
+        """Adjunction creates asymmetric constituents with mother-of dependency without
+        daughter dependency"""
+        X.mother = Y
+        Y.add_adjunct(X)
+        Y.invalidate()
+        return {X, Y}
+
+    def add_adjunct(X, A):
+        """Adds the adjunct A, replacing the shared empty frozenset by a set of X's own"""
+        if not X.adjuncts:
+            X.adjuncts = set()
+        X.adjuncts.add(A)
+
+    def AdjunctionPreconditions(X, Y):
+        return X.isRoot() and \
+               Y.isRoot() and \
+               X.head().license_adjunction() and \
+               X.head().license_adjunction() in Y.head().features
+
+    def label_chain(X):
+        if X.chain_index == 0:
+            X.chain_index = derivation_context().new_chain_index()
+            X.invalidate()
+
+    def minimal_search(X, feature):
+        """Closest constituent with the feature along the labelling and complement path, cached per phrase"""
+        if X.zero_level():
+            X = X.complement()
+            if not X or X.zero_level():
+                return None
+        if X.cached_goals is None:
+            X.cached_goals = dict()
+        if feature not in X.cached_goals:
+            goal = next((c for c in X.const if feature in c.head().features), None)
+            if not goal:
+                Y = X.search_continuation()
+                goal = Y.minimal_search(feature) if Y else None
+            X.cached_goals[feature] = goal
+        return X.cached_goals[feature]
+
+    def search_continuation(X):
+        """Phrase inside the phrase X where minimal search continues"""
+        Y = next(c for c in X.const if c.head() == X.head())
+        if Y.zero_level():
+            Y = Y.complement()
+        if Y and not Y.zero_level():
+            return Y
+
+    def translate_goals(X, Y):
+        """Maps the cached results of minimal search inside X to its copy Y"""
+        goals = dict()
+        for feature, goal in X.cached_goals.items():
+            if goal is X.left():
+                goal = Y.left()
+            elif goal is X.right():
+                goal = Y.right()
+            elif goal:
+                goal = Y.const[X.const.index(X.search_continuation())].minimal_search(feature)
+            goals[feature] = goal
+        return goals
+
+    def sister(X):
+        if X.mother:
+            return next((const for const in X.mother.const if const != X), None)
+
+    def complement(X):
+        """Complement is a right sister of a zero-level object"""
+        if X.zero_level() and X.isLeft():
+            return X.sister()
+
+    def left_sister(X):
+        if X.sister() and X.mother.right() == X:
+            return X.sister()
+
+    # Calculates the head of any phrase structure object X ("labelling algorithm")
+    # Returns the most prominent zero-level category inside X
+    # The head is cached in the node
+    def head(X):
+        if X.zero_level():
+            return X
+        if X.cached_head is None:
+            for x in X.const:
+                if x and x.zero_level():
+                    X.cached_head = x
+                    break
+            else:
+                X.cached_head = x.head()
+        return X.cached_head
+
+    def subcategorization(X, open_head=None):
+        """Recursive interface test for complement and specifier subcategorization.
+        The specifier of open_head, if given, is not tested"""
+        if X.zero_level():
+            return X.complement_subcategorization(X.complement()) and \
+                   (X is open_head or X.specifier_subcategorization()) and \
+                   X.w_subcategorization()
+        return X.left().subcategorization(open_head) and X.right().subcategorization(open_head)
+
+    def subcategorization_failure(X):
+        """Returns the name of the first subcategorization test that fails inside X, None if all pass"""
+        if X.zero_level():
+            if not X.complement_subcategorization(X.complement()):
+                return 'complement'
+            if not X.specifier_subcategorization():
+                return 'specifier'
+            if not X.w_subcategorization():
+                return 'w-complement'
+            return None
+        return X.left().subcategorization_failure() or X.right().subcategorization_failure()
+
+    def w_subcategorization(X):
+        if X.terminal():
+            if X.obligatory_wcomplement_features():
+                return False
+        if X.left() and X.right():
+            if not X.right().w_selects(X.left()):
+                return False
+        if X.left() and not X.left().terminal():
+            if not X.left().w_subcategorization():
+                return False
+        if X.right() and not X.right().terminal():
+            if not X.right().w_subcategorization():
+                return False
+        return True
+
+    def complement_subcategorization(X, Y):
+        """Complement subcategorization under [X Y]"""
+        if not Y:
+            return not X.positive_comp_selection()
+        return (X.positive_comp_selection() <= Y.head().features) and \
+               not (X.negative_comp_selection() & Y.head().features)
+
+    def specifier_subcategorization(X, Spec=None):
+        """Specifier subcategorization under [XP YP]"""
+        if not Spec:
+            if not X.specifier():
+                return not X.positive_spec_selection()
+            Spec = X.specifier()
+        return X.positive_spec_selection() <= Spec.head().features and \
+               not (X.negative_spec_selection() & Spec.head().features)
+
+    def specifier(X):
+        """Specifier of X is phrasal left constituent inside the project from X"""
+        x = X.head()
+        while x and x.mother and x.mother.head() == X:
+            if x.mother.left() != X:
+                return x.mother.left()
+            x = x.mother
+
+    def linearize(X):
+        if X.cached_linearization is None:
+            fragments = []
+            if not X.elliptic:
+                fragments += [x.linearize() for x in X.adjuncts if x.linearizes_left()]
+                if X.zero_level():
+                    fragments.append(X.linearize_word()[:-1] + ' ')
+                else:
+                    fragments += [x.linearize() for x in X.const]
+                fragments += [x.linearize() for x in X.adjuncts if x.linearizes_right()]
+            X.cached_linearization = ''.join(fragments)
+        return X.cached_linearization
+
+    # Spellout algorithm for words, creates morpheme boundaries marked by symbol #
+    def linearize_word(X):
+        if X.terminal():
+            return X.phonological_exponent + '#'
+        return ''.join([x.linearize_word() for x in X.const])
+
+    # Definition for bound morpheme
+    def bound_morpheme(X):
+        return 'PC:#X' in X.features
+
+    # Definition for EPP
+    def EPP(X):
+        return 'EPP' in X.features
+
+    # Definition for operators
+    def operator(X):
+        return 'WH' in X.features
+
+    # Definition for scope markers
+    def scope_marker(X):
+        return 'SCOPE' in X.features
+
+    def linearizes_left(X):
+        return 'λ:L' in X.head().features
+
+    def linearizes_right(X):
+        return 'λ:R' in X.head().features
+
+    def isRoot(X):
+        return not X.mother
+
+    def mandateDirectHeadMerge(X):
+        return 'ε' in X.features
+
+    def licenseDirectHeadMerge(X):
+        return 'ε' in X.features
+
+    def obligatory_wcomplement_features(X):
+        return {f.split(':')[1] for f in X.features if f.startswith('!wCOMP')}
+
+    def positive_spec_selection(X):
+        return {f.split(':')[1] for f in X.features if f.startswith('!SPEC')}
+
+    def negative_spec_selection(X):
+        return {f.split(':')[1] for f in X.features if f.startswith('-SPEC')}
+
+    def positive_comp_selection(X):
+        return {f.split(':')[1] for f in X.features if f.startswith('!COMP')}
+
+    def negative_comp_selection(X):
+        return {f.split(':')[1] for f in X.features if f.startswith('-COMP')}
+
+    def license_adjunction(X):
+        return next((f.split(':')[1] for f in X.features if f.startswith('α:')), None)
+
+    def __str__(X):
+        """Simple printout function for phrase structure objects"""
+        return X.render()
+
+    def render(X, chains=None):
+        """Printout in which chain indices are mapped through chains, if given.
+        Only the unmapped printout is cached"""
+        if chains is not None:
+            if X.elliptic:
+                return '__' + X.get_chain_subscript(chains)
+            if X.terminal():
+                return X.phonological_exponent
+            if X.zero_level():
+                return '(' + ' '.join([x.render(chains) for x in X.const]) + ')'
+            return '[' + ' '.join([x.render(chains) for x in X.const]) + ']' + X.get_chain_subscript(chains)
+        if X.cached_str is None:
+            if X.elliptic:
+                X.cached_str = '__' + X.get_chain_subscript()
+            elif X.terminal():
+                X.cached_str = X.phonological_exponent
+            elif X.zero_level():
+                X.cached_str = '(' + ' '.join([x.__str__() for x in X.const]) + ')'
+            else:
+                X.cached_str = '[' + ' '.join([x.__str__() for x in X.const]) + ']' + X.get_chain_subscript()
+        return X.cached_str
+
+    def get_chain_subscript(X, chains=None):
+        if X.chain_index != 0:
+            return ':' + str(chains[X.chain_index] if chains else X.chain_index)
+        return ''
+
+    def collect_chain_indices(X, chains):
+        """Numbers the chains inside X in the order of their first occurrence (pre-order),
+        continuing the numbering in chains"""
+        if X.chain_index and X.chain_index not in chains:
+            chains[X.chain_index] = len(chains) + 1
+        if not X.terminal():
+            X.left().collect_chain_indices(chains)
+            X.right().collect_chain_indices(chains)
+        for A in X.adjuncts:
+            A.collect_chain_indices(chains)
+        return chains
+
+    # Defines the major lexical categories used in all printouts
+    def lexical_category(X):
+        return next((f for f in major_lexical_categories if f in X.features), '?')
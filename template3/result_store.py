@@ -0,0 +1,246 @@
+"""Append-only, memory-mapped store of derivation results.
+
+The store consists of a data file and a small index file (<data file>.idx).
+The data file is a sequence of records, each a one-byte kind and a payload length
+(uint32) followed by the payload:
+
+    N   numeration (comma-separated lexical items), opens the results of one derivation
+    P   derivation path of the accepted output that follows: per step, its length
+        and the operation and operand indices (uint8)
+    S   accepted output: linearization length (uint16), linearization, structure encoding
+    I   reason why the numeration was rejected before search (feasibility check), if it was
+    E   statistics closing the derivation: n_steps, n_accepted (uint64), budget that truncated it
+    L   lexical item interned by the structure encodings, in order of their ids
+
+The records of one derivation (N to E) are streamed into a spill file of their own
+while the derivation runs and appended to the data file as one block when it ends,
+so that concurrent derivations do not interleave; L records are appended as soon as
+a lexical item is interned, so they may precede that block.
+The index records the offset of every N record under the hash of the numeration,
+and the offset of every L record, so readers can find results without scanning.
+Readers map the data file into memory and hand out memoryview slices of it.
+"""
+
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+
+from template3.lexicon import Lexicon
+from template3.serialization import StructureCodec
+
+DATA_MAGIC = b'TRS1'
+INDEX_MAGIC = b'TRI1'
+RECORD = struct.Struct('<cI')
+INDEX = struct.Struct('<cQQ')       #   Kind, numeration hash (0 for L entries), offset
+STATISTICS = struct.Struct('<QQ')
+LINEARIZATION = struct.Struct('<H')
+
+
+def numeration_hash(numeration):
+    """Order-independent 64-bit hash of a numeration"""
+    key = ','.join(sorted(numeration)).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+
+def read_index(index_filename):
+    """Returns the numeration entries (hash, offset) and the L record offsets of an index file"""
+    numerations, lexical_items = [], []
+    with open(index_filename, 'rb') as f:
+        data = f.read()
+    if data[:4] != INDEX_MAGIC:
+        raise ValueError(f'{index_filename} is not a result store index')
+    for kind, h, offset in INDEX.iter_unpack(memoryview(data)[4:]):
+        if kind == b'N':
+            numerations.append((h, offset))
+        else:
+            lexical_items.append(offset)
+    return numerations, lexical_items
+
+
+def encode_path(path):
+    return b''.join(bytes((len(step),) + tuple(step)) for step in path)
+
+
+def decode_path(payload):
+    path, i = [], 0
+    while i < len(payload):
+        n = payload[i]
+        path.append(tuple(payload[i + 1:i + 1 + n]))
+        i += 1 + n
+    return tuple(path)
+
+
+def record(kind, payload):
+    return RECORD.pack(kind, len(payload)) + payload
+
+
+def read_record(buffer, offset):
+    """Returns the kind, payload (memoryview) and the offset of the next record"""
+    kind, length = RECORD.unpack_from(buffer, offset)
+    start = offset + RECORD.size
+    return kind, buffer[start:start + length], start + length
+
+
+class ResultStore:
+    """Writes derivation results into an append-only store"""
+    def __init__(self, filename, lexicon=None):
+        self.filename = filename
+        self.codec = StructureCodec(lexicon or Lexicon())
+        new = not os.path.exists(filename) or os.path.getsize(filename) == 0
+        if not new:
+            with ResultReader(filename, self.codec.lexicon) as reader:
+                for exponent in reader.codec.exponents:
+                    self.codec.intern(exponent)
+        self.lock = threading.Lock()
+        self.data_file = open(filename, 'ab')
+        self.index_file = open(filename + '.idx', 'ab')
+        if new:
+            self.data_file.write(DATA_MAGIC)
+            self.index_file.write(INDEX_MAGIC)
+
+    def write_record(self, kind, payload):
+        offset = self.data_file.tell()
+        self.data_file.write(record(kind, payload))
+        return offset
+
+    def begin(self, numeration):
+        """Opens the records of one derivation, see DerivationRecords"""
+        return DerivationRecords(self, numeration)
+
+    def encode(self, X, chains=None):
+        """Encodes X, appending records for lexical items it interns for the first time"""
+        with self.lock:
+            n = len(self.codec.exponents)
+            encoding = self.codec.encode(X, chains)
+            for exponent in self.codec.exponents[n:]:
+                offset = self.write_record(b'L', exponent.encode('utf-8'))
+                self.index_file.write(INDEX.pack(b'L', 0, offset))
+        return encoding
+
+    def commit(self, numeration, spill):
+        """Appends the block of records in the file object spill, read from its start"""
+        with self.lock:
+            offset = self.data_file.tell()
+            spill.seek(0)
+            shutil.copyfileobj(spill, self.data_file)
+            self.index_file.write(INDEX.pack(b'N', numeration_hash(numeration), offset))
+
+    def close(self):
+        self.data_file.close()
+        self.index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DerivationRecords:
+    """Records of one derivation. They are written into a temporary spill file next to
+    the store as the outputs are accepted, so that no derivation is held in memory, and
+    copied into the store as one block by end()"""
+    def __init__(self, store, numeration):
+        self.store = store
+        self.numeration = numeration
+        self.spill = tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(store.filename)))
+        self.spill.write(record(b'N', ','.join(numeration).encode('utf-8')))
+
+    def add(self, linearization, X, path=None, chains=None):
+        """Records one accepted output, its phrase structure and the derivation path, if any"""
+        encoding = self.store.encode(X, chains)
+        if path is not None:
+            self.spill.write(record(b'P', encode_path(path)))
+        linearization = linearization.encode('utf-8')
+        self.spill.write(record(b'S', LINEARIZATION.pack(len(linearization)) + linearization + encoding))
+
+    def end(self, n_steps, n_accepted, truncated=None, infeasible=None):
+        if infeasible:
+            self.spill.write(record(b'I', infeasible.encode('utf-8')))
+        self.spill.write(record(b'E', STATISTICS.pack(n_steps, n_accepted) + (truncated or '').encode('utf-8')))
+        try:
+            self.store.commit(self.numeration, self.spill)
+        finally:
+            self.spill.close()
+
+
+class ResultReader:
+    """Memory-mapped, read-only view of a result store"""
+    def __init__(self, filename, lexicon=None):
+        self.filename = filename
+        self.numeration_index, lexical_items = read_index(filename + '.idx')
+        with open(filename, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.mmap)
+        if self.buffer[:4] != DATA_MAGIC:
+            raise ValueError(f'{filename} is not a result store')
+        self.codec = StructureCodec(lexicon or Lexicon())
+        for offset in lexical_items:
+            self.codec.intern(bytes(read_record(self.buffer, offset)[1]).decode('utf-8'))
+
+    def derivations(self):
+        """Yields (numeration, offset) for every derivation in the store, in order"""
+        for h, offset in self.numeration_index:
+            yield self.numeration_at(offset), offset
+
+    def numeration_at(self, offset):
+        return bytes(read_record(self.buffer, offset)[1]).decode('utf-8').split(',')
+
+    def lookup(self, numeration):
+        """Returns the offsets of all derivations of the numeration"""
+        h = numeration_hash(numeration)
+        key = sorted(numeration)
+        return [offset for hh, offset in self.numeration_index
+                if hh == h and sorted(self.numeration_at(offset)) == key]
+
+    def scan(self, offset):
+        """Yields the accepted outputs of the derivation at offset as (linearization, encoding, path)
+        triples, the encoding being a zero-copy slice of the store, and returns the statistics"""
+        kind, payload, offset = read_record(self.buffer, offset)
+        path = None
+        infeasible = None
+        while offset < len(self.buffer):
+            kind, payload, offset = read_record(self.buffer, offset)
+            if kind == b'P':
+                path = decode_path(payload)
+            elif kind == b'S':
+                (n,) = LINEARIZATION.unpack_from(payload)
+                yield bytes(payload[2:2 + n]).decode('utf-8'), payload[2 + n:], path
+                path = None
+            elif kind == b'I':
+                infeasible = bytes(payload).decode('utf-8')
+            elif kind == b'E':
+                n_steps, n_accepted = STATISTICS.unpack_from(payload)
+                return {'n_steps': n_steps, 'n_accepted': n_accepted,
+                        'truncated': bytes(payload[STATISTICS.size:]).decode('utf-8') or None,
+                        'infeasible': infeasible}
+            elif kind == b'N':
+                break
+        return None     #   Derivation was never closed (e.g. the writer was interrupted)
+
+    def results(self, offset):
+        """Returns the (linearization, decoded structure, path) triples and the statistics
+        of the derivation at offset"""
+        outputs = []
+        scanner = self.scan(offset)
+        while True:
+            try:
+                linearization, encoding, path = next(scanner)
+            except StopIteration as e:
+                return outputs, e.value
+            outputs.append((linearization, self.codec.decode(encoding), path))
+
+    def close(self):
+        """Unmaps the store; slices handed out by scan() must have been released"""
+        self.buffer.release()
+        self.mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,115 @@
+"""Monte-Carlo sampling of derivations.
+
+When a numeration is too large for the exhaustive search, SpeakerModel.sample()
+runs independent random walks through the same derivational search space. At
+every step a walk applies one of the applicable (operation, operands) candidates,
+chosen uniformly, until the workspace is complete or no operation applies. Each
+walk is seeded from the seed of the sample and its own number, so that a sample
+does not depend on how the walks are scheduled over the threads.
+
+A walk reaches a derivation with the probability 1/W, where W is the product of the
+numbers of candidates along it. Uniform walks therefore favour short and narrow
+derivations. With uniform=True the outputs are reweighted by W (importance
+sampling), which estimates their frequencies as if every accepted derivation were
+equally likely. The mean of W over the walks estimates the number of accepted
+derivations of the exhaustive search (Knuth's estimator).
+
+    sample = sm.sample(numeration, n_walks=1000, seed=1, uniform=True)
+    print(sample.report())
+"""
+
+import math
+
+Z = 1.96    #   Normal quantile of the 95% confidence intervals
+
+
+class Walk:
+    """Outcome of one random walk"""
+    def __init__(self, output_sentence, accepted, weight, n_steps, path):
+        self.output_sentence = output_sentence  #   Linearization of the final workspace, None at a dead end
+        self.accepted = accepted
+        self.weight = weight                    #   Product of the numbers of candidates along the walk
+        self.n_steps = n_steps
+        self.path = path                        #   Replayable derivation path, see SpeakerModel.replay()
+
+
+class Sample:
+    """Estimates computed from a set of random walks"""
+    def __init__(self, walks, seed=None, uniform=False):
+        self.walks = walks
+        self.seed = seed
+        self.uniform = uniform
+
+    def n_walks(self):
+        return len(self.walks)
+
+    def n_accepted(self):
+        return sum(1 for w in self.walks if w.accepted)
+
+    def sentences(self):
+        return {w.output_sentence for w in self.walks if w.accepted}
+
+    def frequencies(self):
+        """Maps each sentence sampled to its estimated frequency among the accepted
+        derivations and the 95% confidence interval, as (estimate, low, high)"""
+        accepted = [w for w in self.walks if w.accepted]
+        if self.uniform:
+            weights = [float(w.weight) for w in accepted]
+        else:
+            weights = [1.0] * len(accepted)
+        total = sum(weights)
+        estimates = dict()
+        for sentence in sorted(self.sentences()):
+            hits = [w.output_sentence == sentence for w in accepted]
+            p = sum(x for x, hit in zip(weights, hits) if hit) / total
+            if self.uniform:
+                estimates[sentence] = ratio_interval(p, weights, hits, total)
+            else:
+                estimates[sentence] = wilson_interval(sum(hits), len(accepted))
+        return estimates
+
+    def estimated_derivations(self):
+        """Estimated number of accepted derivations of the exhaustive search, with its
+        95% confidence interval, as (estimate, low, high)"""
+        values = [float(w.weight) if w.accepted else 0.0 for w in self.walks]
+        n = len(values)
+        mean = sum(values) / n
+        if n < 2:
+            return mean, 0.0, math.inf
+        deviation = math.sqrt(sum((x - mean) ** 2 for x in values) / (n - 1) / n)
+        return mean, max(0.0, mean - Z * deviation), mean + Z * deviation
+
+    def as_dict(self):
+        return {'seed': self.seed,
+                'uniform': self.uniform,
+                'n_walks': self.n_walks(),
+                'n_accepted': self.n_accepted(),
+                'n_steps': sum(w.n_steps for w in self.walks),
+                'estimated_derivations': self.estimated_derivations(),
+                'frequencies': self.frequencies()}
+
+    def report(self):
+        """Human-readable summary of the sample"""
+        estimate, low, high = self.estimated_derivations()
+        s = f'Sample of {self.n_walks()} walks (seed {self.seed}), {self.n_accepted()} accepted\n'
+        s += f'\tEstimated accepted derivations: {estimate:.0f} ({low:.0f}-{high:.0f})\n'
+        for sentence, (p, low, high) in sorted(self.frequencies().items(), key=lambda item: -item[1][0]):
+            s += f'\t{p:6.1%} ({low:.1%}-{high:.1%}) {sentence}\n'
+        return s
+
+
+def wilson_interval(k, n):
+    """Wilson score interval of the proportion k/n"""
+    if n == 0:
+        return 0.0, 0.0, 1.0
+    p = k / n
+    centre = (p + Z * Z / (2 * n)) / (1 + Z * Z / n)
+    margin = Z * math.sqrt(p * (1 - p) / n + Z * Z / (4 * n * n)) / (1 + Z * Z / n)
+    return p, max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def ratio_interval(p, weights, hits, total):
+    """Confidence interval of the importance-weighted proportion p (delta method)"""
+    variance = sum((x * (hit - p)) ** 2 for x, hit in zip(weights, hits)) / (total * total)
+    margin = Z * math.sqrt(variance)
+    return p, max(0.0, p - margin), min(1.0, p + margin)
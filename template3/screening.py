@@ -0,0 +1,138 @@
+"""Screening of the operand pairs of the binary operations.
+
+At every step the search tests the preconditions of Merge, Head Merge and Adjoin
+for every ordered pair of workspace members. A Screen encodes each member as a row
+of integers instead: root and zero-level flags, and bitmasks over the features that
+are selected or licensed somewhere in the lexicon (the head features, the !COMP,
+-COMP, !SPEC and -SPEC selections, the !wCOMP selection of its leftmost part, the
+features of its rightmost part and its α licence). The compiled preconditions
+(template3.grammar) are then conjunctions of mask tests, which are evaluated for
+all pairs at once. Only the pairs that pass reach the preconditions themselves,
+in the order of itertools.permutations, so the search is unchanged.
+
+Screening pays off only in large workspaces, since the compiled preconditions
+are cheap; workspaces smaller than screen_min are not screened. With NumPy the
+pairs of workspaces of at least vector_min members are screened by broadcasting
+over the columns of the rows. NumPy is optional (pip install numpy, see
+requirements-optional.txt): without it, and for lexicons selecting more than 64
+features, the rows are screened in Python. The default thresholds were measured
+on the lexicon of the package; SpeakerModel.screen_min and vector_min set them.
+"""
+
+from collections import namedtuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+SCREEN_MIN = 24     #   Default smallest workspace screened, below it testing every pair is faster
+VECTOR_MIN = 56     #   Default smallest workspace screened with NumPy, below it Python is faster
+
+Row = namedtuple('Row', ['root', 'zero', 'head', 'comp', 'no_comp', 'needs_comp', 'spec', 'no_spec',
+                         'wblock', 'epsilon', 'wcomp', 'rightmost', 'licence'])
+SELECTION_PREFIXES = ('!COMP:', '-COMP:', '!SPEC:', '-SPEC:', '!wCOMP:', 'α:')
+
+
+def merge_pair(X, Y):
+    if not X.root or not Y.root or Y.wblock:
+        return False
+    if X.zero:
+        return not X.comp & ~Y.head and not X.no_comp & Y.head
+    if Y.zero:
+        return not Y.needs_comp
+    return not Y.spec & ~X.head and not Y.no_spec & X.head
+
+
+def head_merge_pair(X, Y):
+    return Y.epsilon and X.zero and Y.zero and not Y.wcomp & ~X.rightmost
+
+
+def adjunction_pair(X, Y):
+    return X.root and Y.root and bool(X.licence & Y.head)
+
+
+class Screen:
+    """Screens the operand pairs of the compiled binary operations of a CompiledGrammar"""
+    pair_tests = {'merge': merge_pair, 'head merge': head_merge_pair, 'adjunction': adjunction_pair}
+
+    def __init__(self, grammar, screen_min=SCREEN_MIN, vector_min=VECTOR_MIN):
+        self.grammar = grammar
+        self.screen_min = screen_min
+        self.vector_min = vector_min
+        self.operations = {op_index: kind for op_index, kind in grammar.screened.items() if kind in self.pair_tests}
+        names = {f.split(':')[1] for f in grammar.lexical_features if f.startswith(SELECTION_PREFIXES)}
+        self.bits = {name: 1 << i for i, name in enumerate(sorted(names))}
+        self.vectorized = numpy is not None and len(self.bits) <= 64
+        self.wcomplements = grammar.has_feature('!wCOMP')
+        self.masks = dict()     #   id(feature set): (feature set, mask)
+
+    def mask(self, features):
+        entry = self.masks.get(id(features))
+        if entry is None:
+            entry = self.masks[id(features)] = (features, sum(self.bits.get(f, 0) for f in features))
+        return entry[1]
+
+    def row(self, X):
+        """Row of the workspace member X, cached in X (see speaker_model.tcopy)"""
+        if X.cached_row and X.cached_row[0] is self:
+            return X.cached_row[1]
+        H = X.head()
+        own = self.grammar.selection(X.features)
+        head = self.grammar.selection(H.features)
+        row = Row(root=not X.mother,
+                  zero=X.zero_level(),
+                  head=self.mask(H.features),
+                  comp=self.mask(own.positive_comp),
+                  no_comp=self.mask(own.negative_comp),
+                  needs_comp=bool(own.positive_comp),
+                  spec=self.mask(head.positive_spec),
+                  no_spec=self.mask(head.negative_spec),
+                  wblock=self.wcomplements and X.terminal() and bool(own.obligatory_wcomplement),
+                  epsilon='ε' in X.features,
+                  wcomp=self.mask(self.grammar.selection(X.leftmost().features).obligatory_wcomplement),
+                  rightmost=self.mask(X.rightmost().features),
+                  licence=self.bits[head.adjunction] if head.adjunction else 0)
+        X.cached_row = (self, row)
+        return row
+
+    def screen(self, sWM):
+        """Maps the op_index of each screened operation to the operand pairs from sWM
+        that may satisfy its preconditions, or returns None if sWM is too small to
+        be worth screening"""
+        if len(sWM) < self.screen_min:
+            return None
+        rows = [self.row(X) for X in sWM]
+        kinds = set(self.operations.values())
+        if self.vectorized and len(rows) >= self.vector_min:
+            pairs = self.vector_pairs(rows, kinds)
+        else:
+            pairs = {kind: [(i, j) for i, X in enumerate(rows) for j, Y in enumerate(rows) if i != j and test(X, Y)]
+                     for kind, test in self.pair_tests.items() if kind in kinds}
+        return {op_index: [(sWM[i], sWM[j]) for i, j in pairs[kind]] for op_index, kind in self.operations.items()}
+
+    @staticmethod
+    def vector_pairs(rows, kinds):
+        """Pair tests for all ordered pairs at once, by broadcasting the columns of the
+        rows: the first operand runs down and the second across each matrix"""
+        root, zero, head, comp, no_comp, needs_comp, spec, no_spec, wblock, epsilon, wcomp, rightmost, licence = \
+            numpy.array(rows, dtype=numpy.uint64).T
+        root, zero, needs_comp, wblock, epsilon = (column.astype(bool) for column in (root, zero, needs_comp, wblock, epsilon))
+        roots = root[:, None] & root[None, :]
+        matrices = dict()
+        if 'merge' in kinds:
+            complement = ((comp[:, None] & ~head[None, :]) == 0) & ((no_comp[:, None] & head[None, :]) == 0)
+            specifier = ((spec[None, :] & ~head[:, None]) == 0) & ((no_spec[None, :] & head[:, None]) == 0)
+            matrices['merge'] = roots & ~wblock[None, :] & \
+                                numpy.where(zero[:, None], complement, numpy.where(zero[None, :], ~needs_comp[None, :], specifier))
+        if 'head merge' in kinds:
+            matrices['head merge'] = epsilon[None, :] & zero[:, None] & zero[None, :] & \
+                                     ((wcomp[None, :] & ~rightmost[:, None]) == 0)
+        if 'adjunction' in kinds:
+            matrices['adjunction'] = roots & ((licence[:, None] & head[None, :]) != 0)
+        pairs = dict()
+        for kind, M in matrices.items():
+            numpy.fill_diagonal(M, False)
+            first, second = numpy.nonzero(M)
+            pairs[kind] = list(zip(first.tolist(), second.tolist()))
+        return pairs
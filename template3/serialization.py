@@ -0,0 +1,135 @@
+"""Compact binary encoding of phrase structure objects.
+
+A structure is stored as a pre-order array of fixed-size node records
+
+    flags (uint8) | lexical item id (uint16) | chain index (uint16) | number of adjuncts (uint8)
+
+Every node is followed by its left and right constituents (unless terminal) and
+then by its adjuncts. Lexical item ids index a table of phonological exponents
+that is shared by all structures encoded with the same codec. Features are not
+stored: terminals take them from the lexicon, zero-level objects created by Head
+Merge inherit them from their right constituent and phrases have none.
+"""
+
+import struct
+
+from template3.lexicon import Lexicon
+from template3.phrase_structure import PhraseStructure
+
+MAGIC = b'PS1'
+NODE = struct.Struct('<BHHB')
+
+ZERO = 0x01
+ELLIPTIC = 0x02
+TERMINAL = 0x04
+SHARED_ADJUNCTS = 0x08      #   Zero-level object shares its adjunct set with its right constituent
+ADJUNCT_LEFT = 0x10         #   Adjunct linearizes to the left (λ:L)
+ADJUNCT_RIGHT = 0x20        #   Adjunct linearizes to the right (λ:R)
+
+
+class StructureCodec:
+    """Encodes and decodes phrase structure objects against a table of interned
+    lexical items, so that many structures can share one table"""
+    def __init__(self, lexicon=None, exponents=()):
+        self.lexicon = lexicon or Lexicon()
+        self.exponents = []
+        self.ids = dict()
+        for exponent in exponents:
+            self.intern(exponent)
+
+    def intern(self, exponent):
+        if exponent not in self.ids:
+            self.ids[exponent] = len(self.exponents)
+            self.exponents.append(exponent)
+        return self.ids[exponent]
+
+    def encode(self, X, chains=None):
+        """Returns the node records of X (without the lexical item table).
+        Chain indices are mapped through chains, if given"""
+        records = []
+        self.encode_node(X, 0, records, chains)
+        return b''.join(records)
+
+    def encode_node(self, X, flags, records, chains=None):
+        if X.zero:
+            flags |= ZERO
+        if X.elliptic:
+            flags |= ELLIPTIC
+        terminal = X.terminal()
+        if terminal:
+            flags |= TERMINAL
+        adjuncts = X.adjuncts
+        if not terminal and X.zero and adjuncts is X.right().adjuncts:
+            flags |= SHARED_ADJUNCTS
+            adjuncts = ()
+        lex_id = self.intern(X.phonological_exponent) if terminal else 0
+        chain_index = chains[X.chain_index] if chains and X.chain_index else X.chain_index
+        records.append(NODE.pack(flags, lex_id, chain_index, len(adjuncts)))
+        if not terminal:
+            self.encode_node(X.left(), 0, records, chains)
+            self.encode_node(X.right(), 0, records, chains)
+        for A in adjuncts:
+            flags = ADJUNCT_LEFT if A.linearizes_left() else ADJUNCT_RIGHT if A.linearizes_right() else 0
+            self.encode_node(A, flags, records, chains)
+
+    def decode(self, data, offset=0):
+        """Rebuilds a phrase structure object from node records"""
+        with memoryview(data) as view:
+            nodes = NODE.iter_unpack(view[offset:])
+            X = self.decode_node(nodes)
+            del nodes   #   Releases the buffer before the view is released
+        return X
+
+    def decode_node(self, nodes):
+        flags, lex_id, chain_index, n_adjuncts = next(nodes)
+        if flags & TERMINAL:
+            X = PhraseStructure()
+            X.phonological_exponent = self.exponents[lex_id]
+            X.features = self.lexicon.compose_lexical_entry(X.phonological_exponent)
+        else:
+            X = PhraseStructure(self.decode_node(nodes), self.decode_node(nodes))
+            if flags & ZERO:
+                X.features = X.right().features
+        X.zero = bool(flags & ZERO)
+        X.elliptic = bool(flags & ELLIPTIC)
+        X.chain_index = chain_index
+        if flags & SHARED_ADJUNCTS:
+            X.adjuncts = X.right().adjuncts
+        for _ in range(n_adjuncts):
+            A = self.decode_node(nodes)
+            A.mother = X
+            X.add_adjunct(A)
+        return X
+
+    def dumps(self, X):
+        """Self-contained encoding of X: header, lexical item table and node records"""
+        body = self.encode(X)
+        table = '\n'.join(self.exponents).encode('utf-8')
+        return MAGIC + struct.pack('<I', len(table)) + table + body
+
+    def loads(self, data):
+        """Decodes the output of dumps(), adopting its lexical item table"""
+        if data[:3] != MAGIC:
+            raise ValueError('not an encoded phrase structure')
+        (n,) = struct.unpack_from('<I', data, 3)
+        self.exponents = bytes(data[7:7 + n]).decode('utf-8').split('\n') if n else []
+        self.ids = {exponent: i for i, exponent in enumerate(self.exponents)}
+        return self.decode(data, 7 + n)
+
+
+def dumps(X, lexicon=None):
+    return StructureCodec(lexicon).dumps(X)
+
+
+def loads(data, lexicon=None):
+    return StructureCodec(lexicon).loads(data)
+
+
+def save(X, filename, lexicon=None):
+    with open(filename, 'wb') as f:
+        f.write(dumps(X, lexicon))
+
+
+def load(filename, lexicon=None):
+    with open(filename, 'rb') as f:
+        return loads(f.read(), lexicon)
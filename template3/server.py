@@ -0,0 +1,173 @@
+"""Long-running derivation service speaking a JSON-lines protocol over stdin/stdout.
+
+Each input line holds one request object, or a JSON array of request objects
+(a batch). A request has the form
+
+    {"id": 7, "numeration": ["the", "dog", "barks"], "targets": ["the dog barks"], "timeout": 5}
+
+where "targets", "timeout", "max_steps" and "max_nodes" are optional. One response
+line is written per request as soon as it completes, so responses may arrive out
+of order:
+
+    {"id": 7, "outputs": [...], "n_steps": 2, "n_accepted": 1, "n_duplicates": 0, "truncated": null,
+     "infeasible": null, "errors": 0, "overgeneration": [], "undergeneration": []}
+
+The timeout is a derivation budget: a search still running at the deadline stops
+and returns its partial outputs with "truncated": "time". Requests that could not
+be answered even so (e.g. still queued shortly after the deadline) get
+{"id": ..., "error": "timeout"}; malformed requests get {"id": ..., "error": ...}.
+Numerations that provably have no derivation are answered at once, with the
+reason in "infeasible" (see template3/feasibility.py). Requests are scheduled
+onto a pool of worker processes, each of which keeps a warm speaker model and a
+fully composed lexicon resident.
+"""
+
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from template3.speaker_model import SpeakerModel
+
+_speaker_model = None   #   Warm speaker model of a worker process
+TIMEOUT_GRACE = 1.0     #   Seconds the watchdog waits past a deadline for the truncated result
+
+
+def _init_worker():
+    """Initializer of the worker processes of the pool: silences the console, whose
+    printout would corrupt the protocol stream, and creates the resident speaker model"""
+    sys.stdout = open(os.devnull, 'w')
+    _load_speaker_model()
+
+
+def _load_speaker_model():
+    """Creates the resident speaker model, which prints nothing to the console"""
+    global _speaker_model
+    _speaker_model = SpeakerModel()
+    _speaker_model.lexicon.compose_speaker_lexicon()
+    _speaker_model.log_file = open(os.devnull, 'w')
+    _speaker_model.verbose = False
+    _speaker_model.tracing = False
+    _speaker_model.feasibility_check = True
+
+
+def derive_request(numeration, targets=None, deadline=None, max_steps=None, max_nodes=None):
+    """Derives one numeration with the resident speaker model and evaluates
+    the outputs against the targets, if any. The deadline is absolute (time.time())
+    so that time spent waiting in the queue counts against it"""
+    if _speaker_model is None:
+        _load_speaker_model()
+    sm = _speaker_model
+    time_limit = max(deadline - time.time(), 0) if deadline is not None else None
+    sm.derive(numeration, max_steps=max_steps, time_limit=time_limit, max_nodes=max_nodes)
+    response = {'outputs': sorted(sm.output_data),
+                'n_steps': sm.n_steps,
+                'n_accepted': sm.n_accepted,
+                'n_duplicates': sm.n_duplicates,
+                'truncated': sm.truncated,
+                'infeasible': sm.infeasible}
+    if targets is not None:
+        targets = set(targets)
+        response['overgeneration'] = sorted(sm.output_data - targets)
+        response['undergeneration'] = sorted(targets - sm.output_data)
+        response['errors'] = len(response['overgeneration']) + len(response['undergeneration'])
+    return response
+
+
+class DerivationServer:
+    """Reads requests from a stream, schedules them onto a worker pool and
+    streams responses back as they complete"""
+    def __init__(self, workers=None, timeout=None, output=None, max_steps=None, max_nodes=None):
+        self.workers = workers
+        self.timeout = timeout                  #   Default per-request timeout in seconds
+        self.max_steps = max_steps              #   Default per-request step and node budgets
+        self.max_nodes = max_nodes
+        self.output = output or sys.stdout
+        self.lock = threading.Lock()            #   Serializes response lines and bookkeeping
+        self.answered = set()                   #   Request keys that have received a response
+        self.deadlines = []                     #   Heap of (deadline, key, request id, future)
+        self.wakeup = threading.Condition(self.lock)
+        self.n_requests = 0
+        self.closed = False
+
+    def respond(self, key, response):
+        """Writes one response line, unless the request has been answered already"""
+        with self.lock:
+            if key in self.answered:
+                return
+            self.answered.add(key)
+            self.output.write(json.dumps(response) + '\n')
+            self.output.flush()
+            self.wakeup.notify_all()
+
+    def submit(self, pool, request):
+        self.n_requests += 1
+        key = self.n_requests
+        request_id = request.get('id', key) if isinstance(request, dict) else key
+        if not isinstance(request, dict) or not isinstance(request.get('numeration'), list):
+            self.respond(key, {'id': request_id, 'error': 'request must contain a numeration list'})
+            return
+        timeout = request.get('timeout', self.timeout)
+        deadline = time.time() + timeout if timeout is not None else None
+        future = pool.submit(derive_request, request['numeration'], request.get('targets'), deadline,
+                             request.get('max_steps', self.max_steps), request.get('max_nodes', self.max_nodes))
+
+        def done(f):
+            if f.cancelled():
+                return
+            try:
+                response = {'id': request_id, **f.result()}
+            except Exception as e:
+                response = {'id': request_id, 'error': f'{type(e).__name__}: {e}'}
+            self.respond(key, response)
+        future.add_done_callback(done)
+
+        if timeout is not None:
+            with self.lock:
+                heapq.heappush(self.deadlines, (time.monotonic() + timeout + TIMEOUT_GRACE, key, request_id, future))
+                self.wakeup.notify_all()
+
+    def watchdog(self):
+        """Answers requests whose deadline has passed with a timeout error"""
+        with self.lock:
+            while not (self.closed and len(self.answered) == self.n_requests):
+                if not self.deadlines:
+                    self.wakeup.wait()
+                    continue
+                deadline, key, request_id, future = self.deadlines[0]
+                now = time.monotonic()
+                if future.done() or key in self.answered:
+                    heapq.heappop(self.deadlines)
+                elif deadline <= now:
+                    heapq.heappop(self.deadlines)
+                    future.cancel()
+                    self.answered.add(key)
+                    self.output.write(json.dumps({'id': request_id, 'error': 'timeout'}) + '\n')
+                    self.output.flush()
+                else:
+                    self.wakeup.wait(deadline - now)
+
+    def serve(self, input=None):
+        input = input or sys.stdin
+        watchdog = threading.Thread(target=self.watchdog, daemon=True)
+        watchdog.start()
+        pool = ProcessPoolExecutor(self.workers, initializer=_init_worker)
+        for line in input:
+            if not line.strip():
+                continue
+            try:
+                requests = json.loads(line)
+            except json.JSONDecodeError as e:
+                self.n_requests += 1
+                self.respond(self.n_requests, {'id': None, 'error': f'invalid JSON: {e}'})
+                continue
+            for request in requests if isinstance(requests, list) else [requests]:
+                self.submit(pool, request)
+        with self.lock:
+            self.closed = True
+            self.wakeup.notify_all()
+        watchdog.join()     #   Returns once every request has been answered
+        pool.shutdown(wait=False, cancel_futures=True)
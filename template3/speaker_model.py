@@ -0,0 +1,604 @@
+"""Model of the speaker which constitutes the executive layer"""
+
+import gc
+import io
+import itertools
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from template3.context import DerivationContext, current_context
+from template3.feasibility import infeasibility, dead_workspace
+from template3.forest import Forest
+from template3.grammar import CompiledGrammar
+from template3.lexicon import Lexicon
+from template3.phrase_structure import PhraseStructure, HASH_MASK
+from template3.sampler import Sample, Walk
+from template3.screening import SCREEN_MIN, VECTOR_MIN
+
+
+def tcopy(SO):
+    """Operations act on copies of their operands, so the members of a workspace never
+    change. The caches in the members, the memo and the lookahead rely on this"""
+    return tuple(x.copy() for x in SO)
+
+
+def footprint(SO):
+    """Constituents an operation depends on: its operands and those linked to them by adjunction"""
+    nodes = set(SO)
+    for X in SO:
+        nodes |= X.adjuncts
+        if X.mother:
+            nodes.add(X.mother)
+    return nodes
+
+
+def workspace_hash(sWM):
+    """Order-independent hash of a workspace: the sum of the structural hashes of its members"""
+    return sum(X.structural_hash() for X in sWM) & HASH_MASK
+
+
+def rehash_workspace(h, removed, added):
+    """Hash of the workspace obtained by replacing the members removed with the members
+    added in a workspace with hash h, in time independent of the size of the workspace"""
+    return (h - sum(X.structural_hash() for X in removed) + sum(X.structural_hash() for X in added)) & HASH_MASK
+
+
+def tlist(X):
+    """Returns the output of an operation as a list, roots before adjuncts, so that
+    the order of the workspace is deterministic"""
+    if isinstance(X, set):
+        return sorted(X, key=lambda x: not x.isRoot())
+    return [X]
+
+GC_THRESHOLD = 10000    #   Allocations between young garbage collections while derivations run
+_gc_lock = threading.Lock()
+_gc_users = 0               #   Derivations running with the tuned threshold
+_gc_thresholds = None       #   Thresholds to restore after the last one
+
+
+@contextmanager
+def tuned_gc(enabled=True):
+    """Raises the threshold of young garbage collections while derivations run. Phrase
+    structure nodes form no reference cycles (see PhraseStructure.mother), so discarded
+    branches are freed by reference counting and frequent cyclic collections would only
+    rescan the live workspaces. Nested and concurrent derivations share the setting,
+    which is restored after the last one"""
+    global _gc_users, _gc_thresholds
+    if not enabled:
+        yield
+        return
+    with _gc_lock:
+        if _gc_users == 0:
+            _gc_thresholds = gc.get_threshold()
+            if _gc_thresholds[0]:
+                gc.set_threshold(max(GC_THRESHOLD, _gc_thresholds[0]), *_gc_thresholds[1:])
+        _gc_users += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_users -= 1
+            if _gc_users == 0:
+                gc.set_threshold(*_gc_thresholds)
+
+
+class BudgetExceeded(Exception):
+    """Raised inside the derivational search function when a derivation budget trips"""
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason    #   'steps', 'time' or 'nodes'
+
+
+class SearchInstrumentation:
+    """Opt-in counters recording where the derivational search function spends its effort"""
+    def __init__(self):
+        self.precondition_calls = Counter()     #   Per operation name
+        self.precondition_passes = Counter()    #   Per operation name
+        self.applications = Counter()           #   Per operation name
+        self.depth_histogram = Counter()        #   Number of workspaces visited at each depth
+        self.dead_ends = 0                      #   Incomplete workspaces where no operation applies
+        self.pruned = 0                         #   Workspaces abandoned by the lookahead
+        self.rejected_outputs = Counter()       #   Per failed subcategorization test
+
+    def reset(self):
+        self.__init__()
+
+    def as_dict(self):
+        return {'precondition_calls': dict(self.precondition_calls),
+                'precondition_passes': dict(self.precondition_passes),
+                'applications': dict(self.applications),
+                'depth_histogram': dict(sorted(self.depth_histogram.items())),
+                'dead_ends': self.dead_ends,
+                'pruned': self.pruned,
+                'rejected_outputs': dict(self.rejected_outputs)}
+
+    def report(self):
+        """Human-readable dump of the counters, written into the log file after each dataset block"""
+        s = 'Search instrumentation:\n'
+        for name in self.precondition_calls:
+            calls = self.precondition_calls[name]
+            passes = self.precondition_passes[name]
+            s += f'\t{name}: {calls} precondition calls, {passes} passed ({passes / calls:.1%}), ' \
+                 f'{self.applications[name]} applications\n'
+        s += f'\tDepth histogram: {dict(sorted(self.depth_histogram.items()))}\n'
+        s += f'\tDead-end branches: {self.dead_ends}\n'
+        s += f'\tPruned branches: {self.pruned}\n'
+        s += f'\tRejected outputs: {dict(self.rejected_outputs)}\n'
+        return s
+
+
+#
+# Model of the speaker which constitutes the executive layer
+# In more realistic models the speaker models must be language-specific
+#
+class SpeakerModel:
+    def __init__(self, instrumented=False):
+        # List of all syntactic operations available in the grammar
+        self.syntactic_operations = [(PhraseStructure.MergePreconditions, PhraseStructure.MergeComposite, 2, 'Merge'),
+                                     (PhraseStructure.HeadMergePreconditions, PhraseStructure.HeadMerge_, 2, 'Head Merge'),
+                                     (PhraseStructure.AdjunctionPreconditions, PhraseStructure.Adjoin_, 2, 'Adjoin')]
+        self.n_accepted = 0
+        self.n_steps = 0
+        self.n_duplicates = 0       #   Accepted derivations that repeated an earlier final workspace
+        self.output_data = set()
+        self.lexicon = Lexicon()
+        self.grammar = None         #   Operations compiled for the lexicon, see compile_grammar()
+        self.log_file = None
+        self.verbose = True         #   Print accepted outputs into the console
+        self.tracing = True         #   Write every derivational step into the log file
+        self.partial_order_reduction = False    #   Explore independent operations in one order only
+        self.feasibility_check = False          #   Reject numerations without derivations before search
+        self.lookahead = False                  #   Prune workspaces from which no output can be derived
+        self.tune_gc = True                     #   Collect cyclic garbage less often during derivations
+        self.screening = False                  #   Screen operand pairs before testing preconditions
+        self.screen_min = SCREEN_MIN            #   Smallest workspace screened
+        self.vector_min = VECTOR_MIN            #   Smallest workspace screened with NumPy, if installed
+        self.derivation_paths = []  #   Path of each accepted output, in order of acceptance
+        self.result_store = None    #   Accepted structures are written into this store, if any
+        self.instrumented = instrumented
+        self.instrumentation = SearchInstrumentation() if instrumented else None
+        # Derivation budgets, None means unlimited
+        self.max_steps = None       #   Maximum number of derivational steps
+        self.time_limit = None      #   Wall-clock limit in seconds
+        self.max_nodes = None       #   Maximum number of phrase structure nodes in the workspace
+        self.truncated = None       #   Name of the budget that stopped the last derivation, if any
+        self.infeasible = None      #   Reason why the last numeration was rejected before search, if it was
+
+    def derive(self, numeration, max_steps=None, time_limit=None, max_nodes=None):
+        """Derives all outputs from the numeration. If a budget trips, the search stops
+        and the outputs found so far are kept, with the budget recorded in self.truncated"""
+        ctx = self.run(numeration, self.log_file, max_steps, time_limit, max_nodes)
+        self.n_steps = ctx.n_steps
+        self.n_accepted = ctx.n_accepted
+        self.output_data = ctx.output_data
+        self.n_duplicates = ctx.n_duplicates
+        self.derivation_paths = ctx.derivation_paths
+        self.truncated = ctx.truncated
+        self.infeasible = ctx.infeasible
+        self.instrumentation = ctx.instrumentation
+
+    def run(self, numeration, log_file=None, max_steps=None, time_limit=None, max_nodes=None):
+        """Reentrant derivation: all state of the derivation (log buffer, counters and outputs)
+        is owned by the returned DerivationContext, so that several derivations can run
+        concurrently with one speaker model. The derivation is traced into log_file if
+        self.tracing is set; without a log file it is not traced at all, since the step log
+        of a large numeration runs to megabytes"""
+        ctx = self.new_context(log_file, max_steps, time_limit, max_nodes)
+        for _ in self.derivation(numeration, ctx):
+            pass
+        return ctx
+
+    def compile_grammar(self):
+        """Compiles the syntactic operations for the lexicon. This happens automatically
+        before a derivation whenever the operations or the lexicon have been replaced"""
+        if not self.grammar or not self.grammar.compiled_for(self.lexicon, self.syntactic_operations):
+            self.grammar = CompiledGrammar(self.lexicon, self.syntactic_operations)
+        return self.grammar
+
+    def new_context(self, log_file=None, max_steps=None, time_limit=None, max_nodes=None):
+        ctx = DerivationContext()
+        ctx.dispatch = self.compile_grammar().dispatch
+        ctx.lookahead = self.grammar.selection if self.lookahead else None
+        ctx.screen = self.grammar.screen(self.screen_min, self.vector_min) if self.screening else None
+        ctx.tracing = self.tracing and log_file is not None
+        ctx.partial_order_reduction = self.partial_order_reduction
+        ctx.log_file = log_file
+        ctx.instrumentation = SearchInstrumentation() if self.instrumented else None
+        ctx.step_budget = max_steps if max_steps is not None else self.max_steps
+        ctx.node_budget = max_nodes if max_nodes is not None else self.max_nodes
+        time_limit = time_limit if time_limit is not None else self.time_limit
+        ctx.deadline = time.monotonic() + time_limit if time_limit is not None else None
+        return ctx
+
+    def derivation(self, numeration, ctx):
+        """Generator that runs one derivation in ctx. It yields every newly generated output
+        sentence and, if ctx.yield_every is set, None after every ctx.yield_every steps, so
+        that callers can run the search in chunks. The results are stored even if the
+        derivation is cancelled (the generator is closed) or fails, as truncated by
+        'cancelled' or 'error'"""
+        if self.result_store:
+            ctx.records = self.result_store.begin(numeration)
+        if self.feasibility_check:
+            ctx.infeasible = infeasibility(numeration, self.lexicon)
+        token = current_context.set(ctx)
+        try:
+            if ctx.infeasible:
+                if ctx.log_file:
+                    ctx.log_file.write(f'NO DERIVATION: {ctx.infeasible}\n')
+            else:
+                with tuned_gc(self.tune_gc):
+                    yield from self.derivational_search_function([self.lexicon.retrieve(item) for item in numeration], ctx)
+        except BudgetExceeded as e:
+            ctx.truncated = e.reason
+            ctx.logging_report = ''
+            if ctx.log_file:
+                ctx.log_file.write(f'\n\nSEARCH TRUNCATED: {e.reason} budget exceeded\n')
+        except GeneratorExit:
+            ctx.truncated = 'cancelled'
+            raise
+        except Exception:
+            ctx.truncated = 'error'
+            raise
+        finally:
+            current_context.reset(token)
+            if ctx.records:
+                ctx.records.end(ctx.n_steps, ctx.n_accepted, ctx.truncated, ctx.infeasible)
+
+    def derive_forest(self, numeration, max_steps=None, time_limit=None, max_nodes=None):
+        """Returns the outputs of the numeration as a packed shared forest (template3.forest).
+        The forest is built by the memoized search of count_derivations(), so its cost grows
+        with the number of distinct workspaces rather than with the number of derivations.
+        Steps are counted per expanded workspace; if a budget trips, the forest holds the
+        outputs found so far and forest.truncated names the budget"""
+        ctx = self.new_context(None, max_steps, time_limit, max_nodes)
+        ctx.forest = Forest()
+        try:
+            self.memoized_search(numeration, ctx)
+        except BudgetExceeded as e:
+            ctx.forest.truncated = e.reason
+        return ctx.forest
+
+    def count_derivations(self, numeration):
+        """Count-only mode: returns the numbers of derivational steps, accepted derivations
+        and distinct output sentences that the full search would produce. Nothing is logged,
+        and only the accepted final workspaces are linearized, once each"""
+        n_steps, n_accepted, sentences, memo = self.memoized_search(numeration, self.new_context())
+        return {'n_steps': n_steps,
+                'n_accepted': n_accepted,
+                'n_sentences': len(sentences),
+                'sentences': sentences,
+                'n_workspaces': len(memo)}
+
+    def memoized_search(self, numeration, ctx):
+        """Searches all derivations from the numeration, expanding identical workspaces
+        reached by different derivations only once. Returns the derivational steps,
+        accepted derivations and output sentences of the full search, and the memo"""
+        ctx.tracing = False
+        memo = dict()
+        sentences = dict()      #   Sentence: its bit in the sentence masks of the memo
+        token = current_context.set(ctx)
+        try:
+            with tuned_gc(self.tune_gc):
+                n_steps, n_accepted, mask = self.count_workspace([self.lexicon.retrieve(item) for item in numeration],
+                                                                 ctx, memo, sentences)
+        finally:
+            current_context.reset(token)
+        return n_steps, n_accepted, {s for s, bit in sentences.items() if mask >> bit & 1}, memo
+
+    def count_workspace(self, sWM, ctx, memo, sentences):
+        """Returns (derivational steps, accepted derivations, output sentences) of the search
+        from sWM, memoized on the structure of the workspace. The output sentences are a mask
+        of the bits that sentences assigns to them, so that a memo entry takes a few bytes
+        however many sentences are derived from it"""
+        key = self.workspace_key(sWM)
+        if key not in memo:
+            if self.derivation_is_complete(sWM):
+                if all(X.subcategorization() for X in sWM):
+                    if ctx.forest is not None:
+                        ctx.forest.add(self.root_structure(sWM), self.canonical_chains(sWM))
+                    sentence = self.root_structure(sWM).linearize().strip()
+                    memo[key] = (0, 1, 1 << sentences.setdefault(sentence, len(sentences)))
+                else:
+                    memo[key] = (0, 0, 0)
+            else:
+                n_steps = n_accepted = mask = 0
+                screened = ctx.screen.screen(sWM) if ctx.screen else None
+                for op_index, Preconditions, OP, n, name in ctx.dispatch:
+                    for SO in self.operands(sWM, op_index, n, screened):
+                        if Preconditions(*SO):
+                            new_sWM = [x for x in sWM if x not in SO] + tlist(OP(*tcopy(SO)))
+                            self.check_budget(new_sWM, ctx)
+                            ctx.n_steps += 1
+                            steps, accepted, outputs = self.count_workspace(new_sWM, ctx, memo, sentences)
+                            n_steps += 1 + steps
+                            n_accepted += accepted
+                            mask |= outputs
+                memo[key] = (n_steps, n_accepted, mask)
+        return memo[key]
+
+    @staticmethod
+    def workspace_key(sWM):
+        """Identifies a workspace up to the order of its members and the numbering of chains.
+        An adjunct is identified together with the constituent it was adjoined to, which
+        its interface tests consult"""
+        return tuple(sorted((X.structural_hash(), X.mother.structural_hash() if X.mother else -1) for X in sWM))
+
+    def sample(self, numeration, n_walks=1000, seed=0, uniform=False, max_workers=None, time_limit=None):
+        """Monte-Carlo mode: runs n_walks independent random derivations in a thread pool
+        and returns their outcomes as a template3.sampler.Sample. Walk i is seeded with
+        (seed, i), so the sample is reproducible. Walks that have not started when the
+        time limit runs out are left out of the sample"""
+        deadline = time.monotonic() + time_limit if time_limit is not None else None
+
+        def walk(i):
+            if deadline is not None and time.monotonic() > deadline:
+                return None
+            return self.random_walk(numeration, random.Random(f'{seed}:{i}'))
+
+        with tuned_gc(self.tune_gc), ThreadPoolExecutor(max_workers) as pool:
+            walks = [w for w in pool.map(walk, range(n_walks)) if w]
+        return Sample(walks, seed, uniform)
+
+    def random_walk(self, numeration, rng):
+        """Derives the numeration by applying one applicable operation, chosen uniformly
+        with rng, at every step. Returns the outcome as a template3.sampler.Walk"""
+        ctx = self.new_context()
+        ctx.tracing = False
+        token = current_context.set(ctx)
+        try:
+            sWM = [self.lexicon.retrieve(item) for item in numeration]
+            removed = []    #   Keeps the hosts of the adjuncts in sWM alive, see PhraseStructure.mother
+            weight = 1
+            while not self.derivation_is_complete(sWM):
+                screened = ctx.screen.screen(sWM) if ctx.screen else None
+                candidates = [(op_index, OP, SO) for op_index, Preconditions, OP, n, name in ctx.dispatch
+                              for SO in self.operands(sWM, op_index, n, screened) if Preconditions(*SO)]
+                if not candidates:
+                    return Walk(None, False, weight, ctx.n_steps, tuple(ctx.path))
+                weight *= len(candidates)
+                op_index, OP, SO = rng.choice(candidates)
+                ctx.path.append((op_index,) + tuple(sWM.index(x) for x in SO))
+                added = tlist(OP(*tcopy(SO)))
+                sWM = [x for x in sWM if x not in SO] + added
+                removed += SO
+                ctx.n_steps += 1
+                if ctx.lookahead and dead_workspace(sWM, added, ctx.lookahead):
+                    return Walk(None, False, weight, ctx.n_steps, tuple(ctx.path))
+            accepted = all(X.subcategorization() for X in sWM)
+            return Walk(self.root_structure(sWM).linearize().strip(), accepted, weight, ctx.n_steps, tuple(ctx.path))
+        finally:
+            current_context.reset(token)
+
+    def derive_batch(self, numerations, max_workers=None, **budgets):
+        """Derives several numerations concurrently in a thread pool and returns their
+        DerivationContexts in the order of the numerations. The derivations are not traced"""
+        with ThreadPoolExecutor(max_workers) as pool:
+            return list(pool.map(lambda numeration: self.run(numeration, **budgets), numerations))
+
+    def derivational_search_function(self, sWM, ctx, depth=0, sleep=None, h=None):
+        """Explores every derivation from sWM. With partial-order reduction, sleep maps
+        operations (op_index followed by the operands) already explored in a sibling branch
+        to their footprints. Since operations copy their operands (see tcopy()), two
+        operations with disjoint footprints commute: applying them in either order yields
+        the same workspace, up to the numbering of chains. A sleeping operation is therefore
+        not applied again until an operation that touches its footprint has been applied.
+        These are sleep sets: every reachable workspace, and hence every output, is still
+        reached, but independent operations are not explored in every interleaving.
+        h is the structural hash of sWM, updated from step to step by rehash_workspace()"""
+        if h is None:
+            h = workspace_hash(sWM)
+        stats = ctx.instrumentation
+        if stats:
+            stats.depth_histogram[depth] += 1
+        if self.derivation_is_complete(sWM):
+            output_sentence = self.process_final_output(sWM, ctx, h)
+            if output_sentence:
+                yield output_sentence
+        else:
+            applied = False
+            if ctx.partial_order_reduction and sleep is None:
+                sleep = dict()
+            screened = ctx.screen.screen(sWM) if ctx.screen else None
+            for op_index, Preconditions, OP, n, name in ctx.dispatch:
+                for SO in self.operands(sWM, op_index, n, screened):
+                    if stats:
+                        stats.precondition_calls[name] += 1
+                    if Preconditions(*SO):
+                        if stats:
+                            stats.precondition_passes[name] += 1
+                        applied = True
+                        if sleep is not None:
+                            operation = (op_index,) + SO
+                            if operation in sleep:
+                                continue
+                        if stats:
+                            stats.applications[name] += 1
+                        if ctx.tracing:
+                            ctx.logging_report += f'\n\t{name}({self.print_lst(SO)})'
+                        added = tlist(OP(*tcopy(SO)))
+                        new_sWM = [x for x in sWM if x not in SO] + added
+                        self.consume_resource(new_sWM, sWM, ctx)
+                        if ctx.lookahead and self.prune(new_sWM, added, ctx):
+                            if sleep is not None:
+                                sleep[operation] = footprint(SO)
+                            continue
+                        if ctx.yield_every and ctx.n_steps % ctx.yield_every == 0:
+                            yield None
+                        ctx.path.append((op_index,) + tuple(sWM.index(x) for x in SO))
+                        new_h = rehash_workspace(h, SO, added)
+                        if sleep is None:
+                            yield from self.derivational_search_function(new_sWM, ctx, depth + 1, h=new_h)
+                        else:
+                            F = footprint(SO)
+                            yield from self.derivational_search_function(new_sWM, ctx, depth + 1,
+                                                                         {u: G for u, G in sleep.items() if not G & F}, new_h)
+                            sleep[operation] = F
+                        ctx.path.pop()
+            if stats and not applied:
+                stats.dead_ends += 1
+
+    @staticmethod
+    def operands(sWM, op_index, n, screened):
+        """Operand tuples whose preconditions are tested: the pairs left by the screening
+        stage if it screened the operation, otherwise every permutation of sWM"""
+        if screened and op_index in screened:
+            return screened[op_index]
+        return itertools.permutations(sWM, n)
+
+    @staticmethod
+    def prune(sWM, added, ctx):
+        """Lookahead: abandons the branch if no output can be derived from sWM"""
+        reason = dead_workspace(sWM, added, ctx.lookahead)
+        if reason:
+            ctx.n_pruned += 1
+            if ctx.instrumentation:
+                ctx.instrumentation.pruned += 1
+            if ctx.tracing:
+                ctx.log_file.write(f'\t= Pruned: {reason}\n\n')
+            return True
+        return False
+
+    @staticmethod
+    def derivation_is_complete(sWM):
+        return len({X for X in sWM if X.isRoot()}) == 1
+
+    @staticmethod
+    def root_structure(sWM):
+        return next((X for X in sWM if not X.mother))
+
+    # Resource recording, this is what gets printed into the log file
+    # Modify to enhance readability and to reflect the operations available
+    # in the grammar
+    def consume_resource(self, new_sWM, old_sWM, ctx):
+        self.check_budget(new_sWM, ctx)
+        ctx.n_steps += 1
+        if not ctx.tracing:
+            return
+        ctx.log_file.write(f'{ctx.n_steps}.\n\n')
+        ctx.log_file.write(f'\t{self.print_constituent_lst(old_sWM)}\n')
+        ctx.log_file.write(f'{ctx.logging_report}')
+        ctx.log_file.write(f'\n\t= {self.print_constituent_lst(new_sWM)}\n\n')
+        ctx.logging_report = ''
+
+    @staticmethod
+    def check_budget(new_sWM, ctx):
+        if ctx.step_budget is not None and ctx.n_steps >= ctx.step_budget:
+            raise BudgetExceeded('steps')
+        if ctx.deadline is not None and time.monotonic() > ctx.deadline:
+            raise BudgetExceeded('time')
+        if ctx.node_budget is not None and sum(X.size() for X in new_sWM) > ctx.node_budget:
+            raise BudgetExceeded('nodes')
+
+    def process_final_output(self, sWM, ctx, h=None):
+        output_sentence = f'{self.root_structure(sWM).linearize()}'
+        key = workspace_hash(sWM) if h is None else h
+        if self.duplicate_final_output(key, output_sentence, ctx):
+            return
+        if ctx.tracing:
+            ctx.log_file.write(f'\t{self.print_constituent_lst(sWM)}\n')
+        for X in sWM:
+            if not X.subcategorization():
+                failure = X.subcategorization_failure() if ctx.instrumentation else None
+                if ctx.instrumentation:
+                    ctx.instrumentation.rejected_outputs[failure] += 1
+                if ctx.tracing:
+                    ctx.log_file.write('\n\n')
+                ctx.final_outputs[key] = (output_sentence, False, failure)
+                return
+        ctx.final_outputs[key] = (output_sentence, True, None)
+        ctx.n_accepted += 1
+        prefix = f'{ctx.n_accepted}'
+        chains = self.canonical_chains(sWM)
+        if self.verbose:
+            print(f'\t({prefix}) {output_sentence} {self.print_constituent_lst(sWM, chains)}')   # Print the output
+        if ctx.tracing:
+            ctx.log_file.write(f'\t^ ACCEPTED: {output_sentence}\n\n')
+        ctx.derivation_paths.append(tuple(ctx.path))
+        if ctx.records:
+            ctx.records.add(output_sentence.strip(), self.root_structure(sWM), ctx.derivation_paths[-1], chains)
+        if output_sentence.strip() not in ctx.output_data:
+            ctx.output_data.add(output_sentence.strip())
+            return output_sentence.strip()
+
+    @staticmethod
+    def duplicate_final_output(key, output_sentence, ctx):
+        """Recognizes a final workspace identical to an earlier one by its structural hash,
+        before anything is rendered, and repeats the earlier verdict without rendering or
+        logging it again. The linearization (cached, hence cheap) guards against hash collisions"""
+        earlier = ctx.final_outputs.get(key)
+        if earlier is None or earlier[0] != output_sentence:
+            return False
+        _, accepted, failure = earlier
+        if accepted:
+            ctx.n_accepted += 1
+            ctx.n_duplicates += 1
+            ctx.derivation_paths.append(tuple(ctx.path))
+        elif ctx.instrumentation:
+            ctx.instrumentation.rejected_outputs[failure] += 1
+        if ctx.tracing:
+            ctx.log_file.write('\t= Same final workspace as in an earlier derivation\n\n')
+        return True
+
+    def canonical_chains(self, sWM):
+        """Maps the chain indices of an accepted workspace to 1, 2, ... in the order of their
+        first occurrence, roots before adjuncts"""
+        chains = dict()
+        for X in sorted(sWM, key=lambda x: not x.isRoot()):
+            X.collect_chain_indices(chains)
+        return chains
+
+    def replay(self, numeration, path):
+        """Deterministically rebuilds one derivation from its recorded path.
+        Returns the final workspace and the log text of the derivation"""
+        ctx = DerivationContext()
+        ctx.log_file = io.StringIO()
+        sWM = [self.lexicon.retrieve(item) for item in numeration]
+        removed = []    #   Keeps the hosts of the adjuncts in sWM alive, see PhraseStructure.mother
+        token = current_context.set(ctx)
+        try:
+            for op_index, *operands in path:
+                Preconditions, OP, n, name = self.syntactic_operations[op_index]
+                SO = tuple(sWM[i] for i in operands)
+                if not Preconditions(*SO):
+                    raise ValueError(f'{name} does not apply at step {ctx.n_steps + 1} of the path')
+                ctx.logging_report += f'\n\t{name}({self.print_lst(SO)})'
+                new_sWM = [x for x in sWM if x not in SO] + tlist(OP(*tcopy(SO)))
+                self.consume_resource(new_sWM, sWM, ctx)
+                sWM = new_sWM
+                removed += SO
+            ctx.log_file.write(f'\t{self.print_constituent_lst(sWM)}\n')
+            self.relink_adjuncts(sWM)
+            return sWM, ctx.log_file.getvalue()
+        finally:
+            current_context.reset(token)
+
+    @staticmethod
+    def relink_adjuncts(sWM):
+        """Links the adjuncts in sWM to the nodes holding them instead of the hosts kept
+        alive by the derivation, so that sWM remains valid after the derivation"""
+        members = set(sWM)
+
+        def relink(X):
+            for A in X.adjuncts:
+                if A in members:
+                    A.mother = X
+                relink(A)
+            if not X.terminal():
+                relink(X.left())
+                relink(X.right())
+        for X in sWM:
+            relink(X)
+
+    def print_lst(self, lst, chains=None):
+        return ', '.join([x.render(chains) for x in lst])
+
+    # To help understand the output
+    def print_constituent_lst(self, sWM, chains=None):
+        str = f'{self.print_lst([x for x in sWM if not x.mother], chains)}'
+        if [x for x in sWM if x.mother]:
+            str += f' + {{ {self.print_lst([x for x in sWM if x.mother], chains)} }}'
+        return str
@@ -0,0 +1,126 @@
+"""Runs whole studies defined by dataset files, and the command line entry point"""
+
+import argparse
+
+from template3.evaluation import evaluate_study
+from template3.language_data import LanguageData
+from template3.result_store import ResultStore
+from template3.screening import SCREEN_MIN, VECTOR_MIN
+from template3.server import DerivationServer
+from template3.speaker_model import SpeakerModel
+
+
+# Run one whole study as defined by the dataset file, itself containing
+# numeration-target sentences blocks
+def run_study(ld, sm, log_file='log.txt'):
+    sm.log_file = ld.start_logging(log_file)
+    n_dataset = 0       #   Number of datasets in the experiment (counter)
+    n_total_errors = 0  #   Count the number of errors in the whole experiment (counter)
+    n_truncated = 0     #   Number of datasets whose search was stopped by a budget (counter)
+    for numeration, gold_standard_dataset in ld.study_dataset:
+        n_dataset += 1
+        print(f'Dataset {n_dataset}:')
+        sm.log_file.write('\n---------------------------------------------------\n')
+        sm.log_file.write(f'Dataset {n_dataset}:\n')
+        sm.log_file.write(f'Numeration: {numeration}\n')
+        sm.log_file.write(f'Predicted outcome: {gold_standard_dataset}\n\n\n')
+        sm.derive(numeration)
+        n_total_errors += ld.evaluate_experiment(sm.output_data, gold_standard_dataset, sm.n_steps, sm.truncated, sm.n_duplicates,
+                                                 sm.infeasible)
+        if sm.truncated:
+            n_truncated += 1
+        if sm.instrumentation:
+            sm.log_file.write(sm.instrumentation.report())
+    print(f'\nTOTAL ERRORS: {n_total_errors}\n')
+    sm.log_file.write(f'\nTOTAL ERRORS: {n_total_errors}')
+    if n_truncated:
+        print(f'TRUNCATED DATASETS: {n_truncated}\n')
+        sm.log_file.write(f'\nTRUNCATED DATASETS: {n_truncated}')
+    sm.log_file.close()
+    return n_total_errors
+
+
+# Count derivations and outputs of every numeration in the study without
+# enumerating them (no log file is written)
+def count_study(ld, sm):
+    for n_dataset, (numeration, gold_standard_dataset) in enumerate(ld.study_dataset, start=1):
+        counts = sm.count_derivations(numeration)
+        print(f'Dataset {n_dataset}: {",".join(numeration)}')
+        print(f'\tDerivational steps: {counts["n_steps"]}')
+        print(f'\tAccepted derivations: {counts["n_accepted"]}')
+        print(f'\tDistinct sentences: {counts["n_sentences"]}')
+
+
+# Estimate the output frequencies of every numeration in the study from
+# random derivations (no log file is written)
+def sample_study(ld, sm, n_walks, seed=0, uniform=False):
+    for n_dataset, (numeration, gold_standard_dataset) in enumerate(ld.study_dataset, start=1):
+        sample = sm.sample(numeration, n_walks, seed, uniform)
+        print(f'Dataset {n_dataset}: {",".join(numeration)}')
+        print(sample.report(), end='')
+        print(f'\tNot sampled: {gold_standard_dataset - sample.sentences()}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='template3', description='Runs a study defined by a dataset file')
+    parser.add_argument('dataset', nargs='?', default='dataset2.txt', help='dataset file with numeration-target sentence blocks')
+    parser.add_argument('--log', default='log.txt', help='log file (default: log.txt)')
+    parser.add_argument('--instrument', action='store_true', help='write search instrumentation counters into the log')
+    parser.add_argument('--max-steps', type=int, default=None, help='derivational step budget per numeration')
+    parser.add_argument('--time-limit', type=float, default=None, help='wall-clock budget (seconds) per numeration')
+    parser.add_argument('--max-nodes', type=int, default=None, help='workspace node budget per numeration')
+    parser.add_argument('--precheck', action='store_true',
+                        help='reject numerations that provably have no derivation before searching')
+    parser.add_argument('--lookahead', action='store_true',
+                        help='prune workspaces from which no output can be derived')
+    parser.add_argument('--reduce', action='store_true',
+                        help='partial-order reduction: explore independent operations in one order only')
+    parser.add_argument('--screen', action='store_true',
+                        help='screen operand pairs of large workspaces before testing preconditions')
+    parser.add_argument('--screen-min', type=int, default=SCREEN_MIN, metavar='N',
+                        help=f'smallest workspace screened by --screen (default: {SCREEN_MIN})')
+    parser.add_argument('--vector-min', type=int, default=VECTOR_MIN, metavar='N',
+                        help=f'smallest workspace screened with NumPy by --screen (default: {VECTOR_MIN})')
+    parser.add_argument('--count', action='store_true',
+                        help='only count derivational steps, accepted derivations and distinct sentences')
+    parser.add_argument('--sample', type=int, default=None, metavar='N',
+                        help='estimate output frequencies from N random derivations per numeration')
+    parser.add_argument('--seed', type=int, default=0, help='random seed of --sample')
+    parser.add_argument('--uniform', action='store_true',
+                        help='weight --sample to be uniform over accepted derivations')
+    parser.add_argument('--results', default=None, help='evaluate the study in batch and export the results table (.csv or .json)')
+    parser.add_argument('--normalize', choices=['whitespace', 'morphemes'], default=None,
+                        help='normalize sentences before comparing them with the gold standard')
+    parser.add_argument('--store', default=None, help='append accepted structures and derivation statistics to this result store')
+    parser.add_argument('--serve', action='store_true', help='serve JSON-lines derivation requests on stdin/stdout')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes in server mode')
+    parser.add_argument('--timeout', type=float, default=None, help='default per-request timeout (seconds) in server mode')
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        DerivationServer(args.workers, args.timeout, max_steps=args.max_steps, max_nodes=args.max_nodes).serve()
+        return
+
+    ld = LanguageData()                                 #   Instantiate the language data object
+    ld.read_dataset(args.dataset)                       #   Reads the dataset file processed by the study
+    sm = SpeakerModel(instrumented=args.instrument)     #   Create default speaker model, would be language-specific in a more realistic model
+    sm.max_steps, sm.time_limit, sm.max_nodes = args.max_steps, args.time_limit, args.max_nodes
+    sm.partial_order_reduction = args.reduce
+    sm.feasibility_check = args.precheck
+    sm.lookahead = args.lookahead
+    sm.screening = args.screen
+    sm.screen_min, sm.vector_min = args.screen_min, args.vector_min
+    if args.store:
+        sm.result_store = ResultStore(args.store, sm.lexicon)
+    if args.count:
+        count_study(ld, sm)
+    elif args.sample:
+        sample_study(ld, sm, args.sample, args.seed, args.uniform)
+    elif args.results:
+        table = evaluate_study(ld, sm, args.normalize, args.log)
+        table.export(args.results)
+        print(', '.join(f'{key}: {value}' for key, value in table.evaluate()['summary'].items()))
+    else:
+        run_study(ld, sm, args.log)                     #   Runs the study
+    if sm.result_store:
+        sm.result_store.close()
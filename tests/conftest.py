@@ -0,0 +1,33 @@
+"""Fixtures shared by the tests: quiet speaker models and the numerations of dataset2.txt"""
+
+from pathlib import Path
+
+import pytest
+
+from template3 import LanguageData, SpeakerModel
+
+DATASET = Path(__file__).resolve().parent.parent / 'dataset2.txt'
+
+
+def quiet_speaker_model(**options):
+    """Speaker model that prints and logs nothing, with the given attributes set"""
+    sm = SpeakerModel()
+    sm.verbose = False
+    sm.tracing = False
+    for name, value in options.items():
+        setattr(sm, name, value)
+    return sm
+
+
+@pytest.fixture(scope='session')
+def speaker_model():
+    """Factory of quiet speaker models, see quiet_speaker_model()"""
+    return quiet_speaker_model
+
+
+@pytest.fixture(scope='session')
+def dataset_numerations():
+    """Numerations of the blocks of dataset2.txt"""
+    ld = LanguageData()
+    ld.read_dataset(DATASET)
+    return [numeration for numeration, _ in ld.study_dataset]
@@ -0,0 +1,68 @@
+"""Tests of the screening of operand pairs (template3.screening).
+
+The default thresholds leave the workspaces of dataset2.txt unscreened, so the
+tests lower them: every workspace is screened, in Python or with NumPy.
+"""
+
+import itertools
+
+import pytest
+
+MAX_STEPS = 2000
+NO_VECTORS = 10 ** 6    #   vector_min that keeps every workspace in Python
+
+
+def record_screening(screen):
+    """Makes the screen keep every workspace it screens with the pairs it returns"""
+    screened = []
+    screen_workspace = screen.screen
+
+    def screen_and_record(sWM):
+        pairs = screen_workspace(sWM)
+        screened.append((sWM, pairs))
+        return pairs
+    screen.screen = screen_and_record
+    return screened
+
+
+@pytest.fixture(params=['python', 'numpy'])
+def vector_min(request):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+        return 0
+    return NO_VECTORS
+
+
+def test_screened_pairs_contain_every_applicable_pair(speaker_model, dataset_numerations, vector_min):
+    sm = speaker_model(screening=True, screen_min=0, vector_min=vector_min)
+    screen = sm.compile_grammar().screen(0, vector_min)
+    if vector_min == 0:
+        assert screen.vectorized
+    screened = record_screening(screen)
+    dispatch = {op_index: Preconditions for op_index, Preconditions, _, _, _ in sm.grammar.dispatch}
+    for numeration in dataset_numerations:
+        screened.clear()
+        sm.run(numeration, max_steps=MAX_STEPS)
+        assert screened
+        for sWM, pairs in screened:
+            for op_index, SOs in pairs.items():
+                Preconditions = dispatch[op_index]
+                assert [SO for SO in SOs if Preconditions(*SO)] == \
+                       [SO for SO in itertools.permutations(sWM, 2) if Preconditions(*SO)]
+
+
+def test_screening_leaves_search_unchanged(speaker_model, dataset_numerations, vector_min):
+    full = speaker_model()
+    screened = speaker_model(screening=True, screen_min=0, vector_min=vector_min)
+    for numeration in dataset_numerations:
+        ctx = full.run(numeration, max_steps=MAX_STEPS)
+        screened_ctx = screened.run(numeration, max_steps=MAX_STEPS)
+        assert (screened_ctx.n_steps, screened_ctx.output_data) == (ctx.n_steps, ctx.output_data), numeration
+
+
+def test_default_thresholds_skip_small_workspaces(speaker_model, dataset_numerations):
+    sm = speaker_model(screening=True)
+    screen = sm.compile_grammar().screen(sm.screen_min, sm.vector_min)
+    workspace = [sm.lexicon.retrieve(item) for item in dataset_numerations[0]]
+    assert screen.screen(workspace) is None
+    assert sm.compile_grammar().screen(0, NO_VECTORS).screen(workspace) is not None
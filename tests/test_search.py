@@ -0,0 +1,79 @@
+"""Regression tests of the derivational search.
+
+The reductions of the search (partial-order reduction, lookahead, screening of
+workspaces of every size) must leave the outputs unchanged, the feasibility check
+must never reject a numeration that has outputs, and the count-only mode must
+report the figures of the full search. Both are checked on the
+numerations of dataset2.txt and on a seeded set of numerations mutated from them.
+"""
+
+import random
+import pytest
+
+MAX_STEPS = 40000   #   Numerations whose full search takes more steps are left out
+N_MUTATIONS = 24
+SEED = 0
+
+
+def mutate(numeration, words, rng):
+    """Drops, adds or replaces one lexical item of the numeration, or reorders it"""
+    numeration = list(numeration)
+    i = rng.randrange(len(numeration))
+    mutation = rng.choice(['drop', 'add', 'replace', 'shuffle'])
+    if mutation == 'drop' and len(numeration) > 2:
+        del numeration[i]
+    elif mutation == 'add':
+        numeration.insert(i, rng.choice(words))
+    elif mutation == 'replace':
+        numeration[i] = rng.choice(words)
+    else:
+        rng.shuffle(numeration)
+    return numeration
+
+
+def mutated(blocks):
+    """The numerations of the blocks and N_MUTATIONS mutations of them"""
+    words = sorted({word for numeration in blocks for word in numeration})
+    rng = random.Random(SEED)
+    return blocks + [mutate(rng.choice(blocks), words, rng) for _ in range(N_MUTATIONS)]
+
+
+@pytest.fixture(scope='module')
+def full_search(speaker_model, dataset_numerations):
+    """DerivationContexts of the full search, for the numerations within MAX_STEPS"""
+    sm = speaker_model()
+    contexts = [(numeration, sm.run(numeration, max_steps=MAX_STEPS)) for numeration in mutated(dataset_numerations)]
+    return [(numeration, ctx) for numeration, ctx in contexts if not ctx.truncated]
+
+
+def test_numerations_with_and_without_outputs(full_search):
+    assert len(full_search) > N_MUTATIONS
+    assert any(ctx.output_data for _, ctx in full_search)
+    assert any(not ctx.output_data for _, ctx in full_search)
+
+
+@pytest.mark.parametrize('options', [{'partial_order_reduction': True},
+                                     {'lookahead': True},
+                                     {'screening': True, 'screen_min': 0},
+                                     {'feasibility_check': True}])
+def test_option_keeps_outputs(speaker_model, full_search, options):
+    sm = speaker_model(**options)
+    for numeration, ctx in full_search:
+        assert sm.run(numeration).output_data == ctx.output_data, numeration
+
+
+def test_options_combined_keep_outputs(speaker_model, full_search):
+    sm = speaker_model(partial_order_reduction=True, lookahead=True, screening=True, screen_min=0,
+                       feasibility_check=True)
+    for numeration, ctx in full_search:
+        assert sm.run(numeration).output_data == ctx.output_data, numeration
+
+
+def test_count_derivations_matches_full_search(speaker_model, full_search):
+    sm = speaker_model()
+    for numeration, ctx in full_search:
+        counts = sm.count_derivations(numeration)
+        assert counts['n_steps'] == ctx.n_steps, numeration
+        assert counts['n_accepted'] == ctx.n_accepted, numeration
+        assert counts['sentences'] == ctx.output_data, numeration
+        assert counts['n_sentences'] == len(ctx.output_data), numeration